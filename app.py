@@ -1,9 +1,32 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
-import random
+import hmac
+import io
+import math
+import os
+import secrets
 import string
-import time
+
+from relatescore import analytics, engine, insights, metrics, profiling, wheel
+from relatescore.analytics import ScoreAnalytics
+from relatescore.auth import DEFAULT_ITERATIONS, PasswordHasher, SessionTokens
+from relatescore.engine import (
+    ASSESSMENT_QUESTIONS,
+    CATEGORIES,
+    DEFAULT_ANSWER,
+    EMA_ALPHA,
+    LIKERT_QUESTIONS,
+    MAX_DAILY_CHANGE,
+    MIN_CHANGE_FLOOR,
+    QUESTIONS_PER_CATEGORY,
+    responses_to_array,
+)
+from relatescore.history import ScoreHistory
+from relatescore.invites import INVITE_TTL_SECONDS, InviteStore, SQLiteInviteStore
+from relatescore.pairs import PairStore, SQLitePairStore
+from relatescore.ratelimit import TokenBucketLimiter
+from relatescore.storage import Storage
+from relatescore.wheel import WheelRenderCache
 
 # ------------------------------------------------------------
 # RelateScore™ Streamlit Prototype (Cloud-safe navigation)
@@ -23,7 +46,7 @@ st.markdown(
     <style>
         .block-container { max-width: 520px; padding-top: 24px; }
         h1, h2, h3 { color: #1A1A1A; font-family: sans-serif; }
-        .stButton > button {
+        .stButton > button, .stFormSubmitButton > button {
             background-color: #C6A667 !important;
             color: #FFFFFF !important;
             border-radius: 10px !important;
@@ -42,6 +65,8 @@ st.markdown(
         .logo svg { display:block; margin:0 auto; overflow: visible !important; }
         .tagline { text-align:center; color:#3A3A3A; margin-bottom: 18px; }
         .rgi-big { font-size: 54px; font-weight: 800; color: #C6A667; text-align: center; line-height: 1.0; }
+        .rgi-live { font-size: 34px; font-weight: 800; color: #C6A667; text-align: center; line-height: 1.0; margin-top: 40px; }
+        .rgi-pair { font-size: 34px; font-weight: 800; color: #C6A667; text-align: center; line-height: 1.0; }
         .small-muted { color:#666; font-size: 0.92rem; }
         .tip-under-btn { margin-top: -10px; margin-bottom: 14px; }
     </style>
@@ -77,195 +102,317 @@ def nav(to_page: str):
     _rerun()
 
 # -----------------------------
-# User Store (shared across sessions, mock for prototype)
+# Metrics (optional, off unless configured; see relatescore/metrics.py)
+# -----------------------------
+@st.cache_resource
+def start_metrics_export() -> dict:
+    """File writer / HTTP endpoint from RELATESCORE_METRICS_*, once per process."""
+    return metrics.start_exporters()
+
+if metrics.ENABLED:
+    start_metrics_export()
+
+# -----------------------------
+# Score analytics (internal, never shown to users; see relatescore/analytics.py)
+# Notes:
+# - compute_scores() feeds per-process quantile sketches of the RGI, category scores and
+#   smoothing deltas; their memory is fixed however many users submit.
+# - With RELATESCORE_ANALYTICS_DIR set, every worker writes its snapshot there for
+#   `python -m relatescore analytics` to merge. With metrics on, quantiles are exported too.
 # -----------------------------
 @st.cache_resource
-def get_user_store():
-    # {username: password} - plain text for prototype, in real use hash
-    return {}
+def get_score_analytics() -> ScoreAnalytics:
+    score_analytics = ScoreAnalytics()
+    if analytics.ANALYTICS_DIR:
+        analytics.start_snapshot_writer(score_analytics)
+    metrics.REGISTRY.callback_summary(
+        "relatescore_score_distribution",
+        "Submitted RGI, smoothed category scores and smoothed - raw deltas (estimated quantiles, this process).",
+        ("series", "category"), lambda: analytics.labelled_summary(score_analytics),
+    )
+    return score_analytics
+
+# -----------------------------
+# Page profiling (optional; see relatescore/profiling.py)
+# Notes:
+# - RELATESCORE_PROFILE_RATE profiles a random fraction of page runs.
+# - With RELATESCORE_PROFILE_TOKEN set, opening the app with ?profile=<token> profiles
+#   every rerun of that browser session, e.g. to capture one slow page on a live instance.
+# -----------------------------
+PROFILE_TOKEN = os.environ.get("RELATESCORE_PROFILE_TOKEN")
+
+def profile_requested() -> bool:
+    if not PROFILE_TOKEN:
+        return False
+    return hmac.compare_digest(st.query_params.get("profile", ""), PROFILE_TOKEN)
 
 # -----------------------------
-# Invite Store (shared across sessions)
+# User Store (shared across sessions, persisted in SQLite)
 # -----------------------------
-INVITE_TTL_SECONDS = 60 * 30  # 30 minutes
+DB_PATH = os.environ.get("RELATESCORE_DB", "relatescore.db")
 
 @st.cache_resource
-def get_invite_store():
-    # { CODE: {"created_at": ts, "used": bool} }
-    return {}
+def get_user_store() -> Storage:
+    # Accounts (PBKDF2 password hashes) + score history; one connection pool per process.
+    return Storage(DB_PATH)
+
+# -----------------------------
+# Password hashing (shared worker pool)
+# -----------------------------
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("RELATESCORE_PBKDF2_ITERATIONS", DEFAULT_ITERATIONS))
+PASSWORD_HASH_WORKERS = int(os.environ.get("RELATESCORE_HASH_WORKERS", 0)) or None  # default: one per core
+AUTH_TOKEN_TTL_SECONDS = 15 * 60
+
+@st.cache_resource
+def get_password_hasher() -> PasswordHasher:
+    # KDF runs on a bounded pool so a login burst cannot oversubscribe the CPU
+    return PasswordHasher(iterations=PASSWORD_HASH_ITERATIONS, workers=PASSWORD_HASH_WORKERS)
+
+@st.cache_resource
+def get_session_tokens() -> SessionTokens:
+    return SessionTokens(ttl_seconds=AUTH_TOKEN_TTL_SECONDS)
+
+def sign_in(username: str) -> None:
+    st.session_state.username = username
+    st.session_state.logged_in = True
+    st.session_state.auth_token = get_session_tokens().issue(username)
+    st.session_state.score_history = None  # reseeded from this user's stored submissions
+
+def check_login() -> None:
+    """Run before every page: a logged-in session must still hold a valid token.
+
+    One HMAC per rerun instead of the KDF; the token is renewed while the session is
+    active, and an expired or forged one signs the session out to the log-in page.
+    """
+    if not st.session_state.get("logged_in"):
+        return
+    token = get_session_tokens().refresh(st.session_state.auth_token, st.session_state.username)
+    if token is None:
+        st.session_state.logged_in = False
+        st.session_state.auth_token = None
+        st.session_state.username = None  # nothing more is stored for this account
+        st.session_state.score_history = None
+        st.session_state.page = "log_in"
+        st.session_state.login_expired = True
+    else:
+        st.session_state.auth_token = token
 
-def _clean_expired_invites(store: dict):
-    now = time.time()
-    expired = [code for code, meta in store.items()
-               if (now - meta.get("created_at", now)) > INVITE_TTL_SECONDS]
-    for code in expired:
-        store.pop(code, None)
+# -----------------------------
+# Invite Store (shared across sessions, thread-safe; see relatescore/invites.py)
+# Notes:
+# - In memory by default: one worker process per host.
+# - With RELATESCORE_INVITE_DB set, codes live in that SQLite file, so a code created on
+#   one worker can be redeemed on any other worker of the same machine.
+# -----------------------------
+INVITE_DB_PATH = os.environ.get("RELATESCORE_INVITE_DB")
+
+@st.cache_resource
+def get_invite_store() -> InviteStore | SQLiteInviteStore:
+    if INVITE_DB_PATH:
+        return SQLiteInviteStore(INVITE_DB_PATH)
+    return InviteStore()
 
 def register_invite(code: str) -> None:
-    store = get_invite_store()
-    _clean_expired_invites(store)
-    store[code] = {"created_at": time.time(), "used": False}
+    get_invite_store().register(code)
 
+@metrics.timed(metrics.CALL_SECONDS, function="validate_invite")
 def validate_invite(code: str):
     """
     Returns (is_valid, reason)
     Reasons: ok | missing | expired | used
     """
-    store = get_invite_store()
-    _clean_expired_invites(store)
-    meta = store.get(code)
-    if not meta:
-        return False, "missing"
-    if (time.time() - meta.get("created_at", time.time())) > INVITE_TTL_SECONDS:
-        store.pop(code, None)
-        return False, "expired"
-    if meta.get("used"):
-        return False, "used"
-    return True, "ok"
+    return get_invite_store().validate(code)
 
 def consume_invite(code: str) -> None:
-    store = get_invite_store()
-    meta = store.get(code)
-    if meta:
-        meta["used"] = True
+    get_invite_store().consume(code)
 
-# -----------------------------
-# Data
-# -----------------------------
-CATEGORIES = [
-    "Emotional Awareness",
-    "Communication Style",
-    "Conflict Tendencies",
-    "Attachment Patterns",
-    "Empathy & Responsiveness",
-    "Self-Insight",
-    "Trust & Boundaries",
-    "Stability & Consistency"
-]
+@metrics.timed(metrics.CALL_SECONDS, function="redeem_invite")
+def redeem_invite(code: str):
+    """validate_invite() + consume_invite() as one atomic step: only one partner can redeem a code.
+
+    Rate limited per client before the store is touched: (False, "throttled") when over
+    the limit; malformed codes are answered "missing" without a lookup.
+    """
+    if not get_invite_limiter().allow(client_key()):
+        return False, "throttled"
+    if len(code) != INVITE_CODE_LENGTH or not INVITE_CODE_SET.issuperset(code):
+        return False, "missing"
+    return get_invite_store().validate_and_consume(code)
 
 # -----------------------------
-# RQ Wheel Color System (per category)
+# Invite redemption rate limit (see relatescore/ratelimit.py)
+# Notes:
+# - Entered codes are the only guessable input, so only redeem_invite() is limited; a
+#   creator's own status checks are not.
+# - Keyed by browser session. st.context.ip_address is the TCP peer, which behind a proxy,
+#   ingress or NAT is shared by many users, so an IP is only used when the request came
+#   through a proxy listed in RELATESCORE_TRUSTED_PROXIES; the client is then the last
+#   X-Forwarded-For address not in that list. Per process, like the in-memory invite store.
+INVITE_CODE_LENGTH = 8
+INVITE_CODE_CHARS = string.ascii_uppercase + string.digits
+INVITE_CODE_SET = frozenset(INVITE_CODE_CHARS)
+INVITE_ATTEMPTS_PER_MINUTE = float(os.environ.get("RELATESCORE_INVITE_ATTEMPTS_PER_MINUTE", 10))
+INVITE_ATTEMPT_BURST = int(os.environ.get("RELATESCORE_INVITE_ATTEMPT_BURST", 5))
+TRUSTED_PROXIES = frozenset(
+    p.strip() for p in os.environ.get("RELATESCORE_TRUSTED_PROXIES", "").split(",") if p.strip()
+)
+
+@st.cache_resource
+def get_invite_limiter() -> TokenBucketLimiter:
+    limiter = TokenBucketLimiter(INVITE_ATTEMPTS_PER_MINUTE / 60.0, INVITE_ATTEMPT_BURST)
+    metrics.REGISTRY.callback_counter(
+        "relatescore_invite_attempts_total", "Invite redemption attempts by rate-limit decision.", ("decision",),
+        lambda: {(k,): v for k, v in limiter.stats().items() if k in ("allowed", "throttled", "fast_rejected")},
+    )
+    return limiter
+
+def forwarded_client_ip():
+    """The client address reported by a trusted proxy, or None (no trusted proxies, or not via one)."""
+    if not TRUSTED_PROXIES or st.context.ip_address not in TRUSTED_PROXIES:
+        return None
+    hops = [h.strip() for h in st.context.headers.get("X-Forwarded-For", "").split(",") if h.strip()]
+    for hop in reversed(hops):  # rightmost entries were appended by our own proxies
+        if hop not in TRUSTED_PROXIES:
+            return hop
+    return None
+
+def client_key() -> str:
+    """Rate-limit key: the client IP from a trusted proxy when configured, else this browser session."""
+    ip = forwarded_client_ip()
+    if ip:
+        return f"ip:{ip}"
+    if "client_id" not in st.session_state:
+        st.session_state.client_id = secrets.token_hex(8)
+    return f"session:{st.session_state.client_id}"
+
 # -----------------------------
-CATEGORY_COLORS = {
-    "Emotional Awareness": "#4A90E2",
-    "Communication Style": "#7ED321",
-    "Conflict Tendencies": "#FF6B6B",
-    "Attachment Patterns": "#A29BFE",
-    "Empathy & Responsiveness": "#FFD700",
-    "Self-Insight": "#5A67D8",
-    "Trust & Boundaries": "#20C997",
-    "Stability & Consistency": "#A1887F"
-}
+# Invite acceptance notifications
+# Notes:
+# - The waiting page subscribes to its code; redeeming it in the partner's session
+#   asks Streamlit to rerun the waiting session, so no thread sleeps or polls meanwhile.
+# - Waking another session uses Streamlit runtime internals; if they are unavailable
+#   (or change), the slow fragment poll below still picks up the acceptance.
+INVITE_FALLBACK_POLL_SECONDS = 30
+
+def _session_waker():
+    """Return (session_id, callback) that reruns the current browser session from any thread.
 
-def _hex_to_rgb01(hex_color: str):
-    hex_color = hex_color.lstrip("#")
-    return tuple(int(hex_color[i:i+2], 16) / 255.0 for i in (0, 2, 4))
-
-def _blend_hex(c1: str, c2: str, t: float) -> str:
-    """Blend c1->c2 with t in [0,1]. Returns hex string."""
-    t = float(np.clip(t, 0.0, 1.0))
-    r1, g1, b1 = _hex_to_rgb01(c1)
-    r2, g2, b2 = _hex_to_rgb01(c2)
-    r = r1 + (r2 - r1) * t
-    g = g1 + (g2 - g1) * t
-    b = b1 + (b2 - b1) * t
-    return "#{:02X}{:02X}{:02X}".format(int(r * 255), int(g * 255), int(b * 255))
-
-def _category_dynamic_color(category: str, score: float) -> str:
-    """Real-time color per category based on its score (0-100):
-    - Low scores bias toward a warm neutral (subtle)
-    - High scores move toward the category's base color
+    Returns None when not running under a Streamlit server (bare mode, AppTest).
     """
-    base = CATEGORY_COLORS.get(category, "#4A90E2")
-    warm_neutral = "#F5F5F5"  # Light neutral base
-    # Map score to intensity; keep conservative so it stays premium
-    intensity = float(np.clip((score - 20.0) / 70.0, 0.0, 1.0))  # 20->0, 90->1
-    return _blend_hex(warm_neutral, base, intensity)
-
-def format_label(cat: str) -> str:
-    return cat.replace(" & ", " &\n")
-
-def draw_rq_wheel(ax, categories, scores_dict):
-    """Draw an RQ Wheel with per-category colors + wedge fills."""
-    n = len(categories)
-    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
-    values = np.array([float(scores_dict.get(c, 50.0)) for c in categories], dtype=float)  # Default to 50 if missing
-
-    # Close the polygon
-    angles_loop = np.concatenate([angles, [angles[0]]])
-    values_loop = np.concatenate([values, [values[0]]])
-
-    # Set theta zero to North (top)
-    ax.set_theta_zero_location('N')
-
-    # Background + hide default grid/spines
-    ax.set_facecolor("#FAF7F2")
-    ax.grid(False)
-    ax.spines['polar'].set_visible(False)
-    ax.set_ylim(0, 110)  # Extra space for labels if needed
-    ax.set_yticks([])
-    ax.set_xticks([])
-
-    # Draw bold gold radial lines up to each vertex
-    for i in range(n):
-        angle = angles[i]
-        ax.plot([angle, angle], [0, values[i]], color='#C9A96E', linewidth=3, zorder=1)
-
-    # Colored wedges per category (simulated gradient via blend and alpha)
-    for i in range(n):
-        a0 = angles[i]
-        a1 = angles[(i + 1) % n]
-        v0 = values[i]
-        v1 = values[(i + 1) % n]
-
-        if i == n - 1:
-            a1 += 2 * np.pi
-
-        # Use average score for color intensity
-        avg_v = (v0 + v1) / 2.0
-        col = _category_dynamic_color(categories[i], avg_v)
-        ax.fill([a0, a0, a1, a1], [0, v0, v1, 0], color=col, alpha=0.25, linewidth=0, zorder=0)
-
-    # Outline polygon (gold, bold)
-    ax.plot(angles_loop, values_loop, linewidth=3, color="#C9A96E", zorder=2)
-
-    # Center gold marker
-    ax.scatter(0, 0, marker='o', s=50, color='#FFD700', zorder=3)
-
-    # Add labels and hex codes inside sectors (horizontal, bold black)
-    for i in range(n):
-        mid_angle = (angles[i] + angles[(i + 1) % n]) / 2.0
-        if mid_angle > 2 * np.pi:
-            mid_angle -= 2 * np.pi
-
-        avg_v = (values[i] + values[(i + 1) % n]) / 2.0
-        label_r = avg_v * 0.45 + 10  # Position inside, adjusted for low scores
-        hex_r = avg_v * 0.65 + 10    # Hex above label
-
-        # Hex code
-        hex_code = CATEGORY_COLORS.get(categories[i], "#000000")
-        ax.text(mid_angle, hex_r, hex_code, ha='center', va='center', fontsize=8, color='black', rotation=0, zorder=4)
-
-        # Category label (bold black, multi-line)
-        ax.text(mid_angle, label_r, format_label(categories[i]), ha='center', va='center', fontsize=10, fontweight='bold', color='black', rotation=0, zorder=4)
-
-LIKERT_QUESTIONS = {
-    cat: [
-        f"On a scale of 1–5, how important is {cat.lower()} to you in relationships?",
-        f"How would you rate your current level in {cat.lower()}?",
-        f"How often do you reflect on {cat.lower()}?"
-    ]
-    for cat in CATEGORIES
-}
+    try:
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    if ctx is None or not Runtime.exists():
+        return None
+    session_id = ctx.session_id
+
+    def wake(_code=None):
+        try:
+            info = Runtime.instance()._session_mgr.get_active_session_info(session_id)
+            if info is None:
+                return  # browser went away
+            session = info.session
+            session._event_loop.call_soon_threadsafe(session.request_rerun, None)
+        except (AttributeError, RuntimeError):
+            pass  # fallback poll will notice
+
+    return session_id, wake
 
-ASSESSMENT_QUESTIONS = {
-    cat: [
-        f"How often do you recognize patterns in {cat.lower()}?",
-        f"How comfortable are you discussing {cat.lower()}?",
-        f"How does {cat.lower()} impact your connections?"
-    ]
-    for cat in CATEGORIES
-}
+# -----------------------------
+# Partner pairs (shared across sessions; see relatescore/pairs.py)
+# Notes:
+# - A redeemed invite pairs the two sessions: the creator is side "a", the redeemer side "b".
+# - Each submission updates the pair's mutual RGI from the partner's cached scores. The
+#   partner's dashboard is woken like the invite waiting page; a slow fragment poll covers
+#   missed wakeups and, with RELATESCORE_INVITE_DB, partners on other worker processes.
+# - Only a session on the dashboard is subscribed (watch_pair / unwatch_pair), so a partner's
+#   submission never reruns a session that is elsewhere, e.g. mid-questionnaire.
+# - Pairs not updated for RELATESCORE_PAIR_TTL seconds (7 days) are dropped by the store.
+PAIR_FALLBACK_POLL_SECONDS = 30
+
+@st.cache_resource
+def get_pair_store() -> PairStore | SQLitePairStore:
+    if INVITE_DB_PATH:
+        return SQLitePairStore(INVITE_DB_PATH)
+    return PairStore()
+
+def join_pair(code: str, side: str) -> None:
+    """Link this session to the pair of redeemed invite `code` (created by whichever side gets here first)."""
+    get_pair_store().create(code)
+    st.session_state.pair_code = code
+    st.session_state.pair_side = side
+
+def current_pair():
+    """(code, side) of this session's pair, or None."""
+    code = st.session_state.get("pair_code")
+    return (code, st.session_state.pair_side) if code else None
+
+def watch_pair() -> None:
+    """Rerun this session when the pair is updated, until unwatch_pair()."""
+    waker = _session_waker()
+    if waker:
+        get_pair_store().subscribe(st.session_state.pair_code, *waker)
+        st.session_state.pair_watch = (st.session_state.pair_code, waker[0])
+
+def unwatch_pair() -> None:
+    watch = st.session_state.get("pair_watch")
+    if watch:
+        get_pair_store().unsubscribe(*watch)
+        st.session_state.pair_watch = None
+
+# -----------------------------
+# RQ Wheel render cache (shared across sessions)
+# Notes:
+# - Keyed by the rounded score vector, so identical wheels are rendered once per process.
+# - Bump WHEEL_STYLE_VERSION whenever the output of relatescore.wheel changes.
+# - Byte-bounded LRU (relatescore.wheel.WheelRenderCache), shared by all sessions.
+WHEEL_STYLE_VERSION = 1
+WHEEL_SCORE_DECIMALS = 1  # the dashboard shows one decimal; finer changes are not visible
+WHEEL_RENDERER = os.environ.get("RQ_WHEEL_RENDERER", "matplotlib")  # "matplotlib" (PNG) | "svg"
+
+@st.cache_resource
+def get_wheel_cache() -> WheelRenderCache:
+    return WheelRenderCache()
+
+def wheel_cache_key(categories, scores_dict, renderer: str = WHEEL_RENDERER) -> tuple:
+    values = tuple(round(float(scores_dict.get(c, 50.0)), WHEEL_SCORE_DECIMALS) for c in categories)
+    return (WHEEL_STYLE_VERSION, renderer, tuple(categories), values)
+
+def _pyplot():
+    """matplotlib.pyplot, imported on the first wheel render so other pages never load it."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+@metrics.timed(metrics.CALL_SECONDS, function="render_rq_wheel_png")
+def _render_rq_wheel_png(categories, scores_dict) -> bytes:
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(6.3, 6.3), subplot_kw=dict(polar=True))
+    wheel.draw_rq_wheel(ax, categories, scores_dict)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")  # same output settings as st.pyplot
+    plt.close(fig)
+    return buf.getvalue()
+
+@metrics.timed(metrics.CALL_SECONDS, function="render_rq_wheel")
+def render_rq_wheel(categories, scores_dict, renderer: str = WHEEL_RENDERER):
+    """Rendered RQ Wheel (PNG bytes or SVG text, see WHEEL_RENDERER), served from the
+    shared cache when the same rounded scores were drawn before."""
+    cache = get_wheel_cache()
+    key = wheel_cache_key(categories, scores_dict, renderer)
+    image = cache.get(key)
+    if image is None:
+        rounded = dict(zip(categories, key[-1]))
+        if renderer == "svg":
+            image = wheel.draw_rq_wheel_svg(categories, rounded)
+        else:
+            image = _render_rq_wheel_png(categories, rounded)
+        cache.put(key, image)
+    return image
 
 # -----------------------------
 # Session state init
@@ -279,26 +426,39 @@ def init_state():
         # Invite flow (local convenience)
         "invite_code": None,  # last generated code in THIS session
         "partner_code": "",
+        "pair_code": None,  # invite code of this session's pair, see join_pair()
+        "pair_side": None,  # "a" (created the invite) | "b" (redeemed it)
+        "pair_watch": None,  # (code, session id) subscribed while on the dashboard, see watch_pair()
 
         # Assessment flow
         "use_mutual": False,
-        "likert_responses": {},
-        "assessment_responses": {},
+        "likert_responses": engine.new_responses(),  # (categories, questions) int8, see relatescore.engine
+        "assessment_responses": engine.new_responses(),
         "scores": None,
         "raw_scores": None,
         "prev_scores": None,
         "prev_scores_ts": None,
-        "score_history": [],
+        "score_history": None,  # ScoreHistory ring buffer, see get_score_history()
         "insights": None,
+        "live_preview": None,  # engine.RunningScores behind the assessment page's live preview
         "username": None,
+        "auth_token": None,  # short-lived proof of a verified login, see sign_in()
     }
     for k, v in defaults.items():
         if k not in st.session_state:
             st.session_state[k] = v
 
 def reset_state():
+    unwatch_pair()
+    pair = current_pair()
+    if pair:
+        get_pair_store().withdraw(*pair)  # the partner no longer sees a mutual score from our answers
+    username = st.session_state.get("username")
+    if username:
+        get_user_store().delete_score_history(username)  # withdrawal erases stored reflections
     for k in list(st.session_state.keys()):
-        del st.session_state[k]
+        if k != "client_id":  # withdrawing does not reset the invite attempt budget
+            del st.session_state[k]
     init_state()
 
 init_state()
@@ -306,136 +466,72 @@ init_state()
 # -----------------------------
 # Helpers
 # -----------------------------
-# -----------------------------
-# Stability Smoothing (EMA + Dampening)
-# Notes:
-# - In this Streamlit prototype we store prior scores in session_state (per browser session).
-# - In production, persist these per-user in your backend so smoothing is consistent across devices/sessions.
-EMA_ALPHA = 0.25  # 0<alpha<=1; lower = smoother, higher = more responsive
-MAX_DAILY_CHANGE = 15.0  # max allowed change in score points per day (per category)
-MIN_CHANGE_FLOOR = 2.0   # minimum allowed change even if dt is very small (prevents "stuck" feeling)
-OUTLIER_SOFT_THRESHOLD = 25.0  # deltas above this get compressed ("dampened")
-
-def _now_ts() -> float:
-    return time.time()
-
-def _dt_days(prev_ts: float | None) -> float:
-    if not prev_ts:
-        return 1.0
-    dt = max(0.0, _now_ts() - float(prev_ts))
-    return max(dt / 86400.0, 1.0 / 1440.0)  # at least 1 minute
-
-def _dampen_delta(delta: float, threshold: float = OUTLIER_SOFT_THRESHOLD) -> float:
-    """Soft dampening: compress very large deltas without hard-clipping."""
-    ad = abs(delta)
-    if ad <= threshold:
-        return delta
-    # Beyond threshold, compress using a square-root curve (smooth, monotonic)
-    compressed = threshold + (ad - threshold) ** 0.5 * 5.0
-    return float(np.sign(delta) * compressed)
-
-def _cap_delta(delta: float, allowed: float) -> float:
-    if abs(delta) <= allowed:
-        return delta
-    return float(np.sign(delta) * allowed)
-
-def smooth_scores(new_scores: dict, prev_scores: dict | None, prev_ts: float | None) -> dict:
-    """Apply EMA smoothing + outlier dampening + max-delta cap to category scores (not including RGI)."""
-    if not prev_scores:
-        return new_scores
-
-    days = _dt_days(prev_ts)
-    allowed = max(MIN_CHANGE_FLOOR, MAX_DAILY_CHANGE * days)
-
-    smoothed = {}
-    for cat in CATEGORIES:
-        new_v = float(new_scores.get(cat, 0.0))
-        old_v = float(prev_scores.get(cat, new_v))
-
-        # 1) dampen outliers in the update step
-        raw_delta = new_v - old_v
-        damp_delta = _dampen_delta(raw_delta)
-
-        # 2) EMA on the dampened target
-        target = old_v + damp_delta
-        ema = old_v + EMA_ALPHA * (target - old_v)
-
-        # 3) cap maximum movement based on elapsed time
-        capped_delta = _cap_delta(ema - old_v, allowed)
-        smoothed[cat] = float(np.clip(old_v + capped_delta, 20, 90))
-
-    return smoothed
-
-def generate_invite_code(length: int = 8) -> str:
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-
+def generate_invite_code(length: int = INVITE_CODE_LENGTH) -> str:
+    return ''.join(secrets.choice(INVITE_CODE_CHARS) for _ in range(length))
+
+SCORE_HISTORY_WINDOW = int(os.environ.get("RELATESCORE_HISTORY_WINDOW", 20))
+
+def get_score_history() -> ScoreHistory:
+    """This session's fixed-size score history, seeded from the user's stored submissions."""
+    hist = st.session_state.get("score_history")
+    if hist is None:
+        hist = ScoreHistory(SCORE_HISTORY_WINDOW, len(CATEGORIES))
+        username = st.session_state.get("username")
+        if username:
+            for rec in get_user_store().score_history(username, limit=SCORE_HISTORY_WINDOW):
+                hist.append(
+                    rec["ts"],
+                    [rec["raw"].get(c, np.nan) for c in CATEGORIES],
+                    [rec["smoothed"].get(c, np.nan) for c in CATEGORIES],
+                    rec["rgi"],
+                )
+        st.session_state.score_history = hist
+    return hist
+
+@metrics.timed(metrics.CALL_SECONDS, function="compute_scores")
 def compute_scores():
-    # --- Step 1: Compute "raw" category scores from the current assessment session
-    raw_cat_scores = {}
-    for cat in CATEGORIES:
-        likert_vals = [st.session_state.likert_responses[q] for q in LIKERT_QUESTIONS[cat]]
-        assess_vals = [st.session_state.assessment_responses[q] for q in ASSESSMENT_QUESTIONS[cat]]
-
-        baseline = float(np.mean(likert_vals)) * 20.0
-        raw = float(np.mean(assess_vals)) * 20.0
-
-        score = (raw / baseline) * 50.0 if baseline > 0 else raw
-
-        if st.session_state.use_mutual:
-            mutual = float(np.random.uniform(40, 80))
-            score = 0.4 * score + 0.6 * mutual
-
-        raw_cat_scores[cat] = float(np.clip(score, 20, 90))
-
-    st.session_state.raw_scores = dict(raw_cat_scores)
-
-    # --- Step 2: Apply stability smoothing (EMA + dampening)
-    prev_scores = st.session_state.get("prev_scores")
-    prev_ts = st.session_state.get("prev_scores_ts")
-    smoothed_cats = smooth_scores(raw_cat_scores, prev_scores, prev_ts)
-
-    # --- Step 3: Compute RGI from the (smoothed) category scores
-    weights = np.array([0.15, 0.15, 0.15, 0.10, 0.15, 0.10, 0.10, 0.10], dtype=float)
-    rgi = float(np.sum(np.array([smoothed_cats[c] for c in CATEGORIES], dtype=float) * weights))
-
-    final_scores = dict(smoothed_cats)
-    final_scores["RGI"] = float(np.clip(rgi, 20, 90))
-
-    # --- Step 4: Persist the smoothed state for next computation (prototype: per session)
-    st.session_state.scores = final_scores
-    st.session_state.prev_scores = dict(smoothed_cats)
-    st.session_state.prev_scores_ts = _now_ts()
-
-    # Optional: keep a short history for debugging / future UI
-    hist = st.session_state.get("score_history", [])
-    hist.append({
-        "ts": st.session_state.prev_scores_ts,
-        "raw": dict(raw_cat_scores),
-        "smoothed": dict(smoothed_cats),
-        "rgi": final_scores["RGI"],
-    })
-    st.session_state.score_history = hist[-20:]
+    """Score the current session's answers (see relatescore.engine) and persist the result."""
+    likert = responses_to_array(st.session_state.likert_responses, LIKERT_QUESTIONS)[0]
+    assess = responses_to_array(st.session_state.assessment_responses, ASSESSMENT_QUESTIONS)[0]
+    pair = current_pair()
+    mutual = None
+    if pair and st.session_state.use_mutual:
+        mutual = get_pair_store().partner_scores(*pair)  # None until the partner has submitted
+
+    # Previous smoothed snapshot: persisted per user (consistent across devices/sessions and
+    # restarts); session_state is only used when nobody is logged in
+    username = st.session_state.get("username")
+    if username:
+        prev_scores, prev_ts = get_user_store().latest_scores(username)
+    else:
+        prev_scores = st.session_state.get("prev_scores")
+        prev_ts = st.session_state.get("prev_scores_ts")
+
+    result = engine.score_session(likert, assess, prev_scores, prev_ts, mutual=mutual)
+
+    st.session_state.raw_scores = result["raw"]
+    st.session_state.scores = result["scores"]
+    st.session_state.prev_scores = result["smoothed"]
+    st.session_state.prev_scores_ts = result["ts"]
+    hist = get_score_history()  # seed from stored submissions *before* this one is written
+    if username:
+        get_user_store().append_scores(
+            username, result["ts"], result["raw"], result["smoothed"], result["scores"]["RGI"]
+        )
+    if pair:
+        # The pair gets this side's own answers, never their blend with the partner's
+        own = [result["raw"][c] for c in CATEGORIES] if mutual is None else \
+            engine.batch_category_scores(likert[None], assess[None])[0]
+        get_pair_store().submit(*pair, own)
+
+    # Keep a short history for the dashboard trend chart
+    raw = [result["raw"][c] for c in CATEGORIES]
+    smoothed = [result["smoothed"][c] for c in CATEGORIES]
+    hist.append(result["ts"], raw, smoothed, result["scores"]["RGI"])
+    get_score_analytics().observe(raw, smoothed, result["scores"]["RGI"])
 
 def generate_insights():
-    insights = []
-    for cat in CATEGORIES:
-        score = st.session_state.scores.get(cat, 0)
-        if score > 70:
-            type_ = "Strength"
-            desc = "This is a strong foundation to build on."
-        elif score < 40:
-            type_ = "Blind Spot"
-            desc = "This pattern may create misunderstandings."
-        else:
-            type_ = "Neutral"
-            desc = "Balanced area with room for awareness."
-        insights.append({
-            "category": cat,
-            "type": type_,
-            "description": desc,
-            "suggestion": "Consider a small experiment this week to shift this pattern by 1%."
-        })
-    st.session_state.insights = insights
+    st.session_state.insights = insights.generate_insights(st.session_state.scores)
 
 def tip_microcopy():
     st.markdown(
@@ -489,16 +585,19 @@ def create_profile_page():
             user_store = get_user_store()
             if username in user_store:
                 st.error("Username already taken.")
+            elif not user_store.create_user(username, get_password_hasher().hash(password)):
+                st.error("Username already taken.")
             else:
-                user_store[username] = password  # Plain text for prototype
-                st.session_state.username = username
-                st.session_state.logged_in = True
+                sign_in(username)
                 nav("home")
 
 def log_in_page():
     display_logo()
     st.header("Welcome back")
 
+    if st.session_state.pop("login_expired", False):
+        st.info("Your session expired. Please log in again.")
+
     username = st.text_input("Username", key="login_username")
     password = st.text_input("Password", type="password", key="login_password")
 
@@ -510,10 +609,14 @@ def log_in_page():
             nav("entry")
     with c2:
         if st.button("Log In", key="login_go", disabled=disabled):
+            # An explicit log in always checks the password; the token only covers reruns
             user_store = get_user_store()
-            if username in user_store and user_store[username] == password:
-                st.session_state.logged_in = True
-                st.session_state.username = username
+            hasher = get_password_hasher()
+            stored = user_store.get_password(username)
+            if stored is not None and hasher.verify(password, stored):
+                if hasher.needs_rehash(stored):
+                    user_store.set_password(username, hasher.hash(password))
+                sign_in(username)
                 nav("home")
             else:
                 st.error("Invalid username or password.")
@@ -577,15 +680,24 @@ def create_invite_page():
             nav("enter_invite")
     tip_microcopy()
 
-    # Auto-transition when invite accepted
+    # Auto-transition when invite accepted: redeem_invite() wakes this session
     st.info("Waiting for partner to accept the invite...")
-    with st.spinner("Checking status..."):
-        time.sleep(5)
-        is_ok, reason = validate_invite(st.session_state.invite_code)
-        if reason == "used":
-            nav("reflection_start")
-        else:
-            _rerun()
+    _, reason = validate_invite(st.session_state.invite_code)
+    if reason == "used":
+        join_pair(st.session_state.invite_code, "a")
+        nav("reflection_start")
+
+    waker = _session_waker()
+    if waker:
+        get_invite_store().subscribe(st.session_state.invite_code, *waker)
+    invite_status_fallback()
+
+@st.fragment(run_every=INVITE_FALLBACK_POLL_SECONDS)
+def invite_status_fallback():
+    _, reason = validate_invite(st.session_state.invite_code)
+    if reason == "used":
+        join_pair(st.session_state.invite_code, "a")
+        nav("reflection_start")
 
 def enter_invite_page():
     display_logo()
@@ -608,15 +720,18 @@ def enter_invite_page():
                 st.error("Please enter a code.")
                 return
 
-            is_ok, reason = validate_invite(st.session_state.partner_code)
+            is_ok, reason = redeem_invite(st.session_state.partner_code)
             if is_ok:
-                consume_invite(st.session_state.partner_code)
+                join_pair(st.session_state.partner_code, "b")
                 nav("reflection_start")
             else:
                 if reason == "expired":
                     st.error("This code has expired. Ask the sender to generate a new one.")
                 elif reason == "used":
                     st.error("This code has already been used. Ask the sender to generate a new one.")
+                elif reason == "throttled":
+                    wait = max(1, math.ceil(get_invite_limiter().retry_after(client_key())))
+                    st.error(f"Too many attempts. Please wait {wait} seconds and try again.")
                 else:
                     st.error("Code not recognized. Ask the sender to generate a new code and share it again.")
 
@@ -637,20 +752,24 @@ def likert_page():
     display_logo()
     st.header("Personal Calibration")
 
-    for cat_i, cat in enumerate(CATEGORIES):
-        st.subheader(cat)
-        for q_i, q in enumerate(LIKERT_QUESTIONS[cat]):
-            st.session_state.likert_responses[q] = st.slider(
-                q, 1, 5, 3, key=f"likert_{cat_i}_{q_i}"
-            )
-
-    c1, c2 = st.columns(2)
-    with c1:
-        if st.button("Back", key="likert_back"):
-            nav("reflection_start")
-    with c2:
-        if st.button("Proceed", key="likert_next"):
-            nav("preview")
+    # One form: sliders change client-side only; the page reruns once, on Back/Proceed
+    with st.form("likert_form", border=False):
+        for cat_i, cat in enumerate(CATEGORIES):
+            st.subheader(cat)
+            for q_i, q in enumerate(LIKERT_QUESTIONS[cat]):
+                st.session_state.likert_responses[cat_i, q_i] = st.slider(
+                    q, 1, 5, DEFAULT_ANSWER, key=f"likert_{cat_i}_{q_i}"
+                )
+
+        c1, c2 = st.columns(2)
+        with c1:
+            back = st.form_submit_button("Back", key="likert_back")
+        with c2:
+            proceed = st.form_submit_button("Proceed", key="likert_next")
+    if back:
+        nav("reflection_start")
+    if proceed:
+        nav("preview")
 
 def preview_page():
     display_logo()
@@ -661,11 +780,19 @@ def preview_page():
     st.write("- A wheel showing patterns")
     st.write("- Strengths, blind spots, and growth areas")
 
-    st.session_state.use_mutual = st.checkbox(
-        "Include simulated mutual reflection?",
-        value=st.session_state.use_mutual,
-        key="mutual_checkbox"
-    )
+    if current_pair():
+        st.session_state.use_mutual = st.checkbox(
+            "Include your partner's reflection?",
+            value=st.session_state.use_mutual,
+            key="mutual_checkbox"
+        )
+        st.markdown(
+            "<div class='small-muted'>Blends in your partner's latest submitted scores. "
+            "If they have not submitted yet, your scores use your answers only.</div>",
+            unsafe_allow_html=True
+        )
+    else:
+        st.session_state.use_mutual = False
 
     c1, c2 = st.columns(2)
     with c1:
@@ -675,16 +802,63 @@ def preview_page():
         if st.button("Proceed to Assessment", key="preview_next"):
             nav("assessment")
 
+# -----------------------------
+# Live preview (assessment page)
+# Notes:
+# - The preview is a keyed fragment and each category's sliders are a small fragment of
+#   their own. A slider's on_change callback updates the running sums
+#   (engine.RunningScores) in O(1), then reruns only the preview fragment: the other
+#   categories, and the slider's own category, are not redrawn. An idle page costs
+#   nothing; there is no timer.
+# - The mini wheel comes from the shared wheel cache.
+# -----------------------------
+MINI_WHEEL_WIDTH = 200
+LIVE_PREVIEW_KEY = "assessment_preview"  # fragment key, see st.rerun(LIVE_PREVIEW_KEY)
+
+def start_live_preview():
+    """Build the running scores from the current answers (once per full page run)."""
+    # Assessment sliders not rendered yet this run start from their default, like the widgets
+    answers = [[st.session_state.get(f"assess_{cat_i}_{q_i}", DEFAULT_ANSWER) for q_i in range(QUESTIONS_PER_CATEGORY)]
+               for cat_i in range(len(CATEGORIES))]
+    st.session_state.live_preview = engine.RunningScores(st.session_state.likert_responses, answers)
+
+def _on_assessment_answer(cat_i: int, q_i: int):
+    value = st.session_state[f"assess_{cat_i}_{q_i}"]
+    st.session_state.assessment_responses[cat_i, q_i] = value  # the category is not redrawn
+    live = st.session_state.live_preview
+    if live is not None:
+        live.update(cat_i, q_i, value)
+        st.rerun(LIVE_PREVIEW_KEY)  # replaces the default rerun of this slider's category
+
+@st.fragment
+def assessment_category(cat_i: int, cat: str):
+    st.subheader(cat)
+    for q_i, q in enumerate(ASSESSMENT_QUESTIONS[cat]):
+        st.session_state.assessment_responses[cat_i, q_i] = st.slider(
+            q, 1, 5, DEFAULT_ANSWER, key=f"assess_{cat_i}_{q_i}",
+            on_change=_on_assessment_answer, args=(cat_i, q_i)
+        )
+
+@st.fragment(key=LIVE_PREVIEW_KEY)
+def live_preview():
+    live = st.session_state.live_preview
+    if live is None:
+        return
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown(f"<div class='rgi-live'>{live.rgi:.1f}</div>", unsafe_allow_html=True)
+        st.caption("Live RGI preview (before smoothing)")
+    with c2:
+        st.image(render_rq_wheel(CATEGORIES, live.score_dict(), renderer="svg"), width=MINI_WHEEL_WIDTH)
+
 def assessment_page():
     display_logo()
     st.header("Relational Assessment")
 
+    start_live_preview()
+    live_preview()
     for cat_i, cat in enumerate(CATEGORIES):
-        st.subheader(cat)
-        for q_i, q in enumerate(ASSESSMENT_QUESTIONS[cat]):
-            st.session_state.assessment_responses[q] = st.slider(
-                q, 1, 5, 3, key=f"assess_{cat_i}_{q_i}"
-            )
+        assessment_category(cat_i, cat)
 
     c1, c2 = st.columns(2)
     with c1:
@@ -697,8 +871,21 @@ def assessment_page():
             else:
                 compute_scores()
                 generate_insights()
+                st.session_state.live_preview = None  # rebuilt on the next visit; ~1 KB per session
                 nav("dashboard")
 
+@st.fragment(run_every=PAIR_FALLBACK_POLL_SECONDS)
+def pair_panel():
+    """Mutual RGI from the pair store's cached value; nothing is recomputed here."""
+    pair = get_pair_store().get(st.session_state.pair_code)
+    if pair is None:
+        return
+    if pair["rgi"] is None:
+        st.info("Your mutual RGI appears here once both of you have submitted a reflection.")
+    else:
+        st.markdown(f"<div class='rgi-pair'>{pair['rgi']:.1f}</div>", unsafe_allow_html=True)
+        st.caption("Mutual RGI (both partners' latest reflections)")
+
 def dashboard_page():
     display_logo()
     st.header("Dashboard")
@@ -712,6 +899,16 @@ def dashboard_page():
     st.markdown(f"<div class='rgi-big'>{st.session_state.scores['RGI']:.1f}</div>", unsafe_allow_html=True)
     st.caption("Relationship Growth Index")
 
+    if current_pair():
+        # The partner's submission reruns this page (cheap: no rescoring, cached wheel)
+        watch_pair()
+        pair_panel()
+
+    hist = get_score_history()
+    if len(hist) >= 2:
+        st.line_chart({"RGI": hist.rgi()}, height=160)
+        st.caption(f"RGI over your last {len(hist)} submissions")
+
     # Debug/verification: show smoothing behavior (optional)
     with st.expander("Stability smoothing (EMA) details", expanded=False):
         st.write(f"EMA alpha: {EMA_ALPHA}")
@@ -728,13 +925,11 @@ def dashboard_page():
                     "Smoothed": round(sm_v, 1),
                     "Delta": round(sm_v - raw_v, 1),
                 })
-            st.dataframe(rows, use_container_width=True)
+            st.dataframe(rows, width="stretch")
 
     # RQ Wheel (multi-color, real-time per category)
     scores = st.session_state.scores
-    fig, ax = plt.subplots(figsize=(6.3, 6.3), subplot_kw=dict(polar=True))
-    draw_rq_wheel(ax, CATEGORIES, scores)
-    st.pyplot(fig, use_container_width=True)
+    st.image(render_rq_wheel(CATEGORIES, scores), width="stretch")
 
     st.subheader("Key Insights")
     for insight in (st.session_state.insights or []):
@@ -773,5 +968,15 @@ PAGES = {
     "dashboard": dashboard_page,
 }
 
+# Per-page timing when metrics are enabled (timed() is a no-op otherwise)
+PAGES = {name: metrics.timed(metrics.PAGE_SECONDS, page=name)(fn) for name, fn in PAGES.items()}
+
+check_login()
 page = st.session_state.get("page", "entry")
-PAGES.get(page, entry_page)()
\ No newline at end of file
+if page != "dashboard":
+    unwatch_pair()  # partner updates only rerun a session that is showing the mutual RGI
+render_page = PAGES.get(page, PAGES["entry"])
+if profiling.should_profile(force=profile_requested()):
+    profiling.profile_call(page if page in PAGES else "entry", render_page)
+else:
+    render_page()
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""Invite store under concurrent session threads: striped locks vs one global lock.
+
+Part 1 (correctness): many threads try to redeem the same codes at once, with
+the old validate() then consume() sequence and with validate_and_consume();
+only the latter guarantees one winner per code.
+
+Part 2 (contention): T threads each run a session-like mix (register a code,
+validate it twice, redeem it) for a fixed time. stripes=1 is the single
+global lock; the default store shards codes over 16 locks.
+
+Part 3 (cross-process, with --processes N): N worker processes share one
+SQLiteInviteStore file (as with RELATESCORE_INVITE_DB) and all try to redeem
+every code at once. Each code must be redeemed exactly once across all
+processes; otherwise the script exits with status 1.
+
+    python benchmarks/invite_contention.py --threads 1 4 16 64 --seconds 2
+    python benchmarks/invite_contention.py --threads --processes 4
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from relatescore.invites import DEFAULT_STRIPES, InviteStore, SQLiteInviteStore  # noqa: E402
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def race(store: InviteStore, codes: list, threads: int, atomic: bool) -> int:
+    """Number of codes redeemed by more than one thread."""
+    wins = {code: 0 for code in codes}
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def partner():
+        start.wait()
+        for code in codes:
+            if atomic:
+                ok, _ = store.validate_and_consume(code)
+            else:
+                ok, _ = store.validate(code)
+                if ok:
+                    time.sleep(0)  # the rest of the page runs between the check and the act
+                    store.consume(code)
+            if ok:
+                with lock:
+                    wins[code] += 1
+
+    pool = [threading.Thread(target=partner) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(1 for n in wins.values() if n > 1)
+
+
+def contention(stripes: int, threads: int, seconds: float):
+    store = InviteStore(stripes=stripes)
+    latencies = [[] for _ in range(threads)]
+    ops = [0] * threads
+    start = threading.Barrier(threads + 1)
+    stop = threading.Event()
+
+    def session(i):
+        lat = latencies[i]
+        n = 0
+        start.wait()
+        while not stop.is_set():
+            code = f"T{i:03d}-{n:08d}"
+            for op in (store.register, store.validate, store.validate, store.validate_and_consume):
+                t0 = time.perf_counter()
+                op(code)
+                lat.append(time.perf_counter() - t0)
+            n += 1
+        ops[i] = n * 4
+
+    pool = [threading.Thread(target=session, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    start.wait()
+    time.sleep(seconds)
+    stop.set()
+    for t in pool:
+        t.join()
+    all_lat = [x for lat in latencies for x in lat]
+    return sum(ops) / seconds, pct(all_lat, .5), pct(all_lat, .99), pct(all_lat, .999)
+
+
+def _redeem_worker(path: str, codes: list, seed: int, start, results) -> None:
+    store = SQLiteInviteStore(path)
+    order = codes[:]
+    random.Random(seed).shuffle(order)  # different orders, so processes meet on the same codes
+    start.wait()
+    won = [code for code in order if store.validate_and_consume(code)[0]]
+    store.close()
+    results.put(won)
+
+
+def cross_process_race(processes: int, codes: list) -> Counter:
+    """Redemptions per code when `processes` processes race over one SQLite invite file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "invites.db")
+        store = SQLiteInviteStore(path)
+        for code in codes:
+            store.register(code)
+        store.close()
+
+        ctx = multiprocessing.get_context("spawn")
+        start, results = ctx.Barrier(processes), ctx.Queue()
+        pool = [ctx.Process(target=_redeem_worker, args=(path, codes, seed, start, results))
+                for seed in range(processes)]
+        for p in pool:
+            p.start()
+        wins = Counter(code for _ in pool for code in results.get())
+        for p in pool:
+            p.join()
+        if any(p.exitcode for p in pool):
+            raise RuntimeError("a redeeming process failed")
+    return wins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="*", default=[1, 4, 16, 64])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--stripes", type=int, default=DEFAULT_STRIPES)
+    parser.add_argument("--processes", type=int, default=0,
+                        help="also race this many processes over one SQLite invite file (part 3)")
+    parser.add_argument("--switch-interval", type=float, default=None,
+                        help="sys.setswitchinterval() for the run, e.g. 1e-5 to provoke more preemption")
+    args = parser.parse_args()
+    if args.switch_interval:
+        sys.setswitchinterval(args.switch_interval)
+
+    codes = [f"R{i:05d}" for i in range(2000)]
+    for atomic in (False, True):
+        store = InviteStore()
+        for code in codes:
+            store.register(code)
+        double = race(store, codes, 8, atomic)
+        name = "validate_and_consume" if atomic else "validate + consume"
+        print(f"{name:<22} 8 threads x {len(codes)} codes: {double} codes redeemed twice or more")
+
+    if args.processes:
+        wins = cross_process_race(args.processes, codes)
+        missed = sum(1 for code in codes if wins[code] == 0)
+        double = sum(1 for code in codes if wins[code] > 1)
+        print(f"SQLite, {args.processes} processes x {len(codes)} codes: "
+              f"{double} redeemed twice or more, {missed} never redeemed")
+        if double or missed:
+            print("FAIL: expected every code redeemed exactly once")
+            return 1
+
+    if args.threads:
+        print(f"\n{'threads':>8}{'stripes':>9}{'ops/s':>12}{'p50 us':>9}{'p99 us':>9}{'p99.9 us':>10}")
+    for threads in args.threads:
+        for stripes in (1, args.stripes):
+            rate, p50, p99, p999 = contention(stripes, threads, args.seconds)
+            print(f"{threads:>8}{stripes:>9}{rate:>12,.0f}{p50 * 1e6:>9.1f}{p99 * 1e6:>9.1f}{p999 * 1e6:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
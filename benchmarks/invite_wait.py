@@ -0,0 +1,145 @@
+"""How many sessions can wait on an invite code in one server process?
+
+Compares the old waiting page (one script thread per waiter, sleep(5) + validate +
+full rerun, forever) with the subscription model (consume_invite() wakes waiters).
+
+    python benchmarks/invite_wait.py --sessions 2000
+"""
+import argparse
+import logging
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+logging.disable(logging.WARNING)  # bare-mode Streamlit warnings from importing app.py
+
+import app  # noqa: E402
+
+
+def rss_kib() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def codes(n: int):
+    return [f"W{i:07d}" for i in range(n)]
+
+
+def rerun_cost_seconds(repeat: int = 20) -> float:
+    """Median cost of one full create_invite_page rerun, which the old loop paid every 5 s per waiter."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(Path(app.__file__)), default_timeout=30).run()
+    at.session_state.logged_in = True
+    at.session_state.page = "create_invite"
+    at.session_state.invite_code = "BENCH001"
+    app.register_invite("BENCH001")
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def polling_waiters(n: int, poll: float):
+    """Old model: every waiter holds a thread that sleeps, validates and loops."""
+    store = app.InviteStore()
+    all_codes = codes(n)
+    for c in all_codes:
+        store.register(c)
+    consumed_at = {}
+    latencies = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def wait(code):
+        while not stop.is_set():
+            time.sleep(poll)
+            _, reason = store.validate(code)
+            if reason == "used":
+                with lock:
+                    latencies.append(time.perf_counter() - consumed_at[code])
+                return
+
+    before = rss_kib()
+    threads = [threading.Thread(target=wait, args=(c,), daemon=True) for c in all_codes]
+    for t in threads:
+        t.start()
+    time.sleep(poll / 2)
+    held = threading.active_count()
+    rss = rss_kib() - before
+
+    time.sleep(random.uniform(0, poll))
+    for c in all_codes:
+        consumed_at[c] = time.perf_counter()
+        store.consume(c)
+    for t in threads:
+        t.join(timeout=poll * 3)
+    stop.set()
+    return held, rss, latencies
+
+
+def subscribed_waiters(n: int):
+    """New model: every waiter is a dict entry; consume_invite() calls it back."""
+    store = app.InviteStore()
+    all_codes = codes(n)
+    for c in all_codes:
+        store.register(c)
+    consumed_at = {}
+    latencies = []
+
+    threads_before = threading.active_count()
+    tracemalloc.start()
+    for c in all_codes:
+        store.subscribe(c, f"session-{c}", lambda code: latencies.append(time.perf_counter() - consumed_at[code]))
+    held = threading.active_count() - threads_before
+    kib = tracemalloc.get_traced_memory()[0] // 1024
+    tracemalloc.stop()
+
+    for c in all_codes:
+        consumed_at[c] = time.perf_counter()
+        store.consume(c)
+    return held, kib, latencies
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--poll", type=float, default=5.0, help="old loop sleep interval (seconds)")
+    args = parser.parse_args()
+
+    rerun = rerun_cost_seconds()
+    # thread model: RSS growth; subscription model: traced Python allocations
+    p_threads, p_rss, p_lat = polling_waiters(args.sessions, args.poll)
+    s_threads, s_rss, s_lat = subscribed_waiters(args.sessions)
+
+    print(f"waiting sessions: {args.sessions}")
+    print(f"{'model':<12}{'threads':>10}{'KiB':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'sleep+poll':<12}{p_threads:>10}{p_rss:>10}{pct(p_lat, .5) * 1e3:>10.1f}{pct(p_lat, .99) * 1e3:>10.1f}")
+    print(f"{'subscribe':<12}{s_threads:>10}{s_rss:>10}{pct(s_lat, .5) * 1e3:>10.3f}{pct(s_lat, .99) * 1e3:>10.3f}")
+
+    # Capacity of one core: the old page reran the whole script every `poll` seconds per waiter;
+    # the new page only pays a fragment poll every INVITE_FALLBACK_POLL_SECONDS.
+    print(f"full rerun of create_invite_page: {rerun * 1e3:.1f} ms")
+    print(f"sleep+poll capacity (1 core saturated by reruns): ~{int(args.poll / rerun)} waiting sessions")
+    fallback = app.INVITE_FALLBACK_POLL_SECONDS
+    print(f"subscribe capacity (fragment poll every {fallback}s, costed as a full rerun): ~{int(fallback / rerun)} "
+          f"waiting sessions, {s_rss * 1024 / max(args.sessions, 1):.0f} bytes each")
+
+
+if __name__ == "__main__":
+    main()
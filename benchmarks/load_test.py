@@ -0,0 +1,251 @@
+"""Multi-session load test: N simulated users walk the full page flow at once.
+
+Each user is a Streamlit AppTest session on its own thread, paired with a
+partner through the shared invite store:
+
+    entry -> create_profile -> home -> create_invite (host) / enter_invite (guest)
+          -> reflection_start -> likert -> preview -> assessment -> dashboard
+
+Every widget interaction outside a form is one rerun, as in the browser. The Likert
+sliders sit in a form (answered client-side, sent with one submit); an assessment
+slider reruns only the live preview fragment in the browser, which AppTest cannot
+drive (its element tree then holds just that fragment), so the answers are put in
+session state and sent with the submit as well. AppTest drives one rerun at a time
+per process, so reruns from all sessions queue on a single lock, much like
+script runs competing for one core. "latency" is what the user waits (queueing
+plus the rerun), "service" is the rerun alone. Reruns are attributed to the page
+the interaction happened on; a navigation click includes rendering the next page,
+so "assessment" includes scoring and the first dashboard render (the uncached
+wheel). Each user then reruns the dashboard once more, as when a partner's
+submission wakes it, which gives the "dashboard" row its own timing.
+
+    python benchmarks/load_test.py --sessions 50 --think-ms 200
+
+Runs entirely locally: accounts go to a throwaway SQLite file unless
+RELATESCORE_DB is set, and nothing listens on a port.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP = str(ROOT / "app.py")
+logging.disable(logging.WARNING)  # bare-mode Streamlit warnings
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class Recorder:
+    def __init__(self):
+        self.run_lock = threading.Lock()  # AppTest is not thread-safe: one rerun at a time
+        self._lock = threading.Lock()
+        self.latency = defaultdict(list)  # page -> seconds
+        self.service = defaultdict(list)
+        self.flows = 0
+        self.errors = []
+
+    def rerun(self, at, action=None):
+        """Apply `action` (a widget interaction) and rerun, timed under the page it happened on."""
+        page = at.session_state.page if at.session_state else "entry"
+        t0 = time.perf_counter()
+        with self.run_lock:
+            t1 = time.perf_counter()
+            (action or at).run()
+            t2 = time.perf_counter()
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].message}")
+        with self._lock:
+            self.latency[page].append(t2 - t0)
+            self.service[page].append(t2 - t1)
+        return at
+
+
+class Pair:
+    def __init__(self):
+        self.code = None
+        self.ready = threading.Event()
+
+
+def user_flow(rec: Recorder, index: int, pair: Pair, host: bool, seed: int, think_ms: float, timeout: float):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 100_003 + index)
+
+    def think():
+        if think_ms:
+            time.sleep(rng.expovariate(1000.0 / think_ms))
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    rec.rerun(at)
+    for step in (
+        lambda: at.button(key="entry_create").click(),
+        lambda: at.text_input(key="create_username").input(f"load{seed}_{index}"),
+        lambda: at.text_input(key="create_password").input("load-test-password"),
+        lambda: at.checkbox(key="consent_checkbox").check(),
+        lambda: at.button(key="create_continue").click(),
+    ):
+        think()
+        rec.rerun(at, step())
+
+    # pairing
+    think()
+    if host:
+        rec.rerun(at, at.button(key="home_create_invite").click())
+        pair.code = at.session_state.invite_code
+        pair.ready.set()
+        # The partner's consume_invite() wakes this session in a live server;
+        # here the wake-up rerun is simulated by rerunning until the page moves on.
+        deadline = time.monotonic() + timeout
+        while at.session_state.page == "create_invite":
+            if time.monotonic() > deadline:
+                raise TimeoutError("partner never accepted the invite")
+            time.sleep(0.02)
+            rec.rerun(at)
+    else:
+        rec.rerun(at, at.button(key="home_enter_invite").click())
+        if not pair.ready.wait(timeout):
+            raise TimeoutError("host never created an invite")
+        think()
+        rec.rerun(at, at.text_input(key="partner_code_input").input(pair.code))
+        think()
+        rec.rerun(at, at.button(key="enter_invite_continue").click())
+    if at.session_state.page != "reflection_start":
+        raise RuntimeError(f"pairing ended on {at.session_state.page!r}")
+
+    def answer(prefix, via_state=False):
+        # no full rerun per slider (form / fragment), see module docstring
+        for cat_i in range(8):
+            for q_i in range(3):
+                think()
+                key = f"{prefix}_{cat_i}_{q_i}"
+                if via_state:
+                    at.session_state[key] = rng.randint(1, 5)
+                else:
+                    at.slider(key=key).set_value(rng.randint(1, 5))
+
+    think()
+    rec.rerun(at, at.button(key="refstart_go").click())
+    answer("likert")
+    think()
+    rec.rerun(at, at.button(key="likert_next").click())
+    think()
+    rec.rerun(at, at.checkbox(key="mutual_checkbox").check())
+    think()
+    rec.rerun(at, at.button(key="preview_next").click())
+    answer("assess", via_state=True)
+
+    # Submit is occasionally rejected by the simulated toxicity filter; resubmit like a user would
+    for _ in range(20):
+        think()
+        rec.rerun(at, at.button(key="assess_submit").click())
+        if at.session_state.page == "dashboard":
+            break
+    else:
+        raise RuntimeError("assessment never reached the dashboard")
+    think()
+    rec.rerun(at)  # dashboard rerun, e.g. woken by the partner's submission
+    if at.session_state.page != "dashboard":
+        raise RuntimeError(f"dashboard rerun ended on {at.session_state.page!r}")
+    with rec._lock:
+        rec.flows += 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent users (rounded up to pairs)")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="mean pause between a user's interactions (exponential); 0 = back to back")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds per rerun / pairing wait")
+    parser.add_argument("--hash-iterations", type=int, default=None,
+                        help="override RELATESCORE_PBKDF2_ITERATIONS for the run")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if "RELATESCORE_DB" not in os.environ:
+        os.environ["RELATESCORE_DB"] = os.path.join(tempfile.mkdtemp(prefix="relatescore-load-"), "load.db")
+    if args.hash_iterations:
+        os.environ["RELATESCORE_PBKDF2_ITERATIONS"] = str(args.hash_iterations)
+
+    n = args.sessions + args.sessions % 2
+    rec = Recorder()
+    pairs = [Pair() for _ in range(n // 2)]
+    rss_start = rss_mb()
+
+    def worker(i):
+        try:
+            user_flow(rec, i, pairs[i // 2], i % 2 == 0, args.seed, args.think_ms, args.timeout)
+        except Exception as exc:  # report and keep the other sessions going
+            with rec._lock:
+                rec.errors.append(f"session {i}: {exc!r}")
+            pairs[i // 2].ready.set()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(n)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    reruns = sum(len(v) for v in rec.latency.values())
+    report = {
+        "sessions": n,
+        "think_ms": args.think_ms,
+        "wall_s": wall,
+        "completed_flows": rec.flows,
+        "errors": rec.errors,
+        "reruns": reruns,
+        "reruns_per_s": reruns / wall,
+        "flows_per_min": rec.flows / wall * 60.0,
+        "reruns_per_flow": reruns / rec.flows if rec.flows else None,
+        "rss_start_mb": rss_start,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "pages": {
+            page: {
+                "reruns": len(lat),
+                "latency_ms": {q: pct(lat, p) * 1e3 for q, p in (("p50", .5), ("p90", .9), ("p99", .99))},
+                "latency_max_ms": max(lat) * 1e3,
+                "service_p50_ms": pct(rec.service[page], .5) * 1e3,
+            }
+            for page, lat in rec.latency.items()
+        },
+    }
+
+    print(f"{n} sessions, think {args.think_ms:g} ms, {wall:.1f} s wall, "
+          f"{rec.flows} flows completed, {len(rec.errors)} errors")
+    print(f"{'page':<18}{'reruns':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'service p50':>13}")
+    for page, row in report["pages"].items():
+        lat = row["latency_ms"]
+        print(f"{page:<18}{row['reruns']:>8}{lat['p50']:>10.1f}{lat['p90']:>10.1f}{lat['p99']:>10.1f}"
+              f"{row['latency_max_ms']:>10.1f}{row['service_p50_ms']:>13.1f}")
+    print(f"throughput: {report['reruns_per_s']:.1f} reruns/s, {report['flows_per_min']:.1f} flows/min, "
+          f"{report['reruns_per_flow'] or 0:.1f} reruns per completed flow")
+    print(f"RSS: {report['rss_start_mb']:.0f} MiB at start, peak {report['peak_rss_mb']:.0f} MiB")
+    for err in rec.errors[:10]:
+        print("error:", err, file=sys.stderr)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 1 if rec.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
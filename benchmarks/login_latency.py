@@ -0,0 +1,105 @@
+"""Login latency under a burst of concurrent logins.
+
+Compares running the KDF directly on every script thread ("inline") with the
+bounded PasswordHasher pool, and times the session-token check that lets reruns
+skip the KDF. While each burst runs, a probe thread repeats a small pure-Python
+task (a stand-in for other users' page reruns) to show what the burst does to
+everyone else.
+
+    python benchmarks/login_latency.py --bursts 1 8 32 64
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from relatescore.auth import PasswordHasher, SessionTokens, hash_password, verify_password  # noqa: E402
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def probe_rerun():
+    return sum(i * i for i in range(20_000))
+
+
+def burst(size: int, login):
+    latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(size + 2)  # users + probe + this thread
+    done = threading.Event()
+    probe = []
+
+    def user():
+        start.wait()
+        t0 = time.perf_counter()
+        login()
+        with lock:
+            latencies.append(time.perf_counter() - t0)
+
+    def prober():
+        start.wait()
+        while not done.is_set():
+            t0 = time.perf_counter()
+            probe_rerun()
+            probe.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=user) for _ in range(size)]
+    probe_thread = threading.Thread(target=prober)
+    for t in threads + [probe_thread]:
+        t.start()
+    start.wait()
+    for t in threads:
+        t.join()
+    done.set()
+    probe_thread.join()
+    return latencies, probe
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--iterations", type=int, default=200_000, help="PBKDF2 cost")
+    parser.add_argument("--workers", type=int, default=None, help="hasher pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    stored = hash_password("correct horse", args.iterations)
+    hasher = PasswordHasher(iterations=args.iterations, workers=args.workers)
+    idle_probe = statistics.median([timed(probe_rerun) for _ in range(20)])
+
+    print(f"PBKDF2 iterations={args.iterations}, pool workers={hasher.workers}, "
+          f"probe rerun idle={idle_probe * 1e3:.1f} ms")
+    print(f"{'burst':>6}{'mode':>8}{'login p50 ms':>14}{'login p99 ms':>14}{'probe p50 ms':>14}{'probe p99 ms':>14}")
+    for size in args.bursts:
+        for mode, login in (
+            ("inline", lambda: verify_password("correct horse", stored)),
+            ("pool", lambda: hasher.verify("correct horse", stored)),
+        ):
+            lat, probe = burst(size, login)
+            print(f"{size:>6}{mode:>8}{pct(lat, .5) * 1e3:>14.1f}{pct(lat, .99) * 1e3:>14.1f}"
+                  f"{pct(probe, .5) * 1e3:>14.1f}{pct(probe, .99) * 1e3:>14.1f}")
+
+    tokens = SessionTokens()
+    token = tokens.issue("alice")
+    n = 100_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        tokens.verify(token, "alice")
+    print(f"session token check (rerun path): {(time.perf_counter() - t0) / n * 1e6:.2f} us")
+    hasher.shutdown()
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Fixed-seed synthetic population for benchmarks.
+
+Answers are not uniform noise: each user gets a personal tendency and each
+category a shift, so score distributions look like real sessions (and exercise
+the clip and smoothing branches) while staying reproducible for a given seed.
+"""
+import numpy as np
+
+from relatescore.engine import CATEGORIES
+
+DEFAULT_SEED = 20240601
+N_QUESTIONS = 3
+
+
+def answers(n_users: int, seed: int = DEFAULT_SEED):
+    """(likert, assessment) int8 arrays of shape (n_users, categories, 3) with values 1-5."""
+    rng = np.random.default_rng(seed)
+    shape = (n_users, len(CATEGORIES), N_QUESTIONS)
+    tendency = rng.normal(3.0, 0.6, size=(n_users, 1, 1))
+    cat_shift = rng.normal(0.0, 0.5, size=(1, len(CATEGORIES), 1))
+    likert = np.clip(np.rint(tendency + rng.normal(0.0, 0.8, size=shape)), 1, 5).astype(np.int8)
+    assessment = np.clip(np.rint(tendency + cat_shift + rng.normal(0.0, 1.0, size=shape)), 1, 5).astype(np.int8)
+    return likert, assessment
+
+
+def histories(n_users: int, n_steps: int, seed: int = DEFAULT_SEED):
+    """(raw, ts): raw scores (users, steps, categories) drifting over time, and
+    submission timestamps (users, steps) a few hours to a few days apart."""
+    rng = np.random.default_rng(seed + 1)
+    start = rng.uniform(20, 90, size=(n_users, 1, len(CATEGORIES)))
+    drift = np.cumsum(rng.normal(0.0, 8.0, size=(n_users, n_steps, len(CATEGORIES))), axis=1)
+    raw = np.clip(start + drift, 20, 90)
+    gaps = rng.exponential(86400.0, size=(n_users, n_steps))
+    ts = 1.7e9 + np.cumsum(gaps, axis=1)
+    return raw, ts
+
+
+def score_dicts(n: int, seed: int = DEFAULT_SEED) -> list:
+    """n {category: score} dicts, e.g. for wheel and color benchmarks."""
+    rng = np.random.default_rng(seed + 2)
+    return [dict(zip(CATEGORIES, row)) for row in rng.uniform(20, 90, size=(n, len(CATEGORIES))).tolist()]
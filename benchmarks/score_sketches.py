@@ -0,0 +1,94 @@
+"""Score analytics sketches: update cost, memory, merge cost and accuracy.
+
+Replays synthetic submission histories (see population.py) through
+ScoreAnalytics the way app.compute_scores() does, split across --workers
+simulated worker processes. The per-worker snapshots are merged after a JSON
+round trip, as `python -m relatescore analytics` does with snapshot files. The
+merged quantiles are then compared with exact quantiles of all submissions:
+
+    rank err  how far q is from the rank range of the estimated q-quantile
+              among all submissions (ties count either way), worst over
+              q = 0.01 .. 0.99 and over the RGI, score and delta series
+
+    python benchmarks/score_sketches.py --users 20000 --steps 20 --workers 4
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import population  # noqa: E402
+from relatescore import analytics, engine  # noqa: E402
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def submissions(n_users: int, n_steps: int, seed: int):
+    """(raw, smoothed, rgi) per submission: (N, categories), (N, categories), (N,)."""
+    raw, ts = population.histories(n_users, n_steps, seed)
+    smoothed = engine.replay_smoothing(raw, ts)
+    rgi = engine.batch_rgi(smoothed)
+    n_cats = len(engine.CATEGORIES)
+    return raw.reshape(-1, n_cats), smoothed.reshape(-1, n_cats), rgi.reshape(-1)
+
+
+def exact_series(raw, smoothed, rgi) -> dict:
+    out = {"RGI": np.sort(rgi)}
+    for i, cat in enumerate(engine.CATEGORIES):
+        out[f"score:{cat}"] = np.sort(smoothed[:, i])
+        out[f"delta:{cat}"] = np.sort(smoothed[:, i] - raw[:, i])
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--k", type=int, default=analytics.ANALYTICS_K)
+    parser.add_argument("--seed", type=int, default=population.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    raw, smoothed, rgi = submissions(args.users, args.steps, args.seed)
+    n = len(rgi)
+    raw_rows, smoothed_rows, rgi_list = raw.tolist(), smoothed.tolist(), rgi.tolist()
+    workers = [analytics.ScoreAnalytics(k=args.k, seed=w) for w in range(args.workers)]
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        workers[i % args.workers].observe(raw_rows[i], smoothed_rows[i], rgi_list[i])
+    observe_us = (time.perf_counter() - t0) / n * 1e6
+
+    snapshots = [json.dumps(w.snapshot()) for w in workers]
+    t0 = time.perf_counter()
+    merged = analytics.ScoreAnalytics.from_snapshot(json.loads(snapshots[0]))
+    for snap in snapshots[1:]:
+        merged.merge(analytics.ScoreAnalytics.from_snapshot(json.loads(snap)))
+    merge_ms = (time.perf_counter() - t0) * 1e3
+
+    worst = 0.0
+    for name, exact in exact_series(raw, smoothed, rgi).items():
+        estimates = merged.sketches[name].quantiles(QUANTILES)
+        below = np.searchsorted(exact, estimates, side="left") / len(exact)
+        at_or_below = np.searchsorted(exact, estimates, side="right") / len(exact)
+        err = np.maximum(np.maximum(below - QUANTILES, QUANTILES - at_or_below), 0.0)  # ties count either way
+        worst = max(worst, float(np.max(err)))
+
+    retained = sum(len(s) for s in merged.sketches.values())
+    print(f"{n:,} submissions over {args.workers} workers, {len(merged.sketches)} series, k={args.k}")
+    print(f"observe()            {observe_us:8.2f} us per submission")
+    print(f"snapshot per worker  {np.mean([len(s) for s in snapshots]) / 1024:8.1f} KiB JSON")
+    print(f"merge {args.workers} snapshots     {merge_ms:8.1f} ms (parse + merge)")
+    print(f"retained items       {retained:8,} ({retained / len(merged.sketches):,.0f} per series, "
+          f"exact would keep {n * len(merged.sketches):,})")
+    print(f"worst rank error     {worst:8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Per-session memory: bytes of session_state per user at 10k simulated sessions.
+
+Builds the values app.py keeps in st.session_state for a user who has just
+submitted an assessment (answers, raw/smoothed scores, the 20-entry score
+history, insights) for N users from the synthetic population, and measures
+the memory they hold with tracemalloc. Answers are built both ways:
+
+    dict   {question text: answer} per questionnaire (the previous layout)
+    array  one (categories, questions) int8 array per questionnaire (current)
+
+Question texts are the shared catalog strings in both cases, as in the app.
+Streamlit's own per-session state (widget values, the session object) is not
+included; it is the same either way.
+
+    python benchmarks/session_memory.py --sessions 10000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import population  # noqa: E402
+from relatescore import engine, insights  # noqa: E402
+from relatescore.engine import ASSESSMENT_QUESTIONS, CATEGORIES, LIKERT_QUESTIONS  # noqa: E402
+from relatescore.history import ScoreHistory  # noqa: E402
+
+HISTORY_WINDOW = 20
+
+
+def as_dict(answers, questions: dict) -> dict:
+    return {q: int(answers[c, j]) for c, cat in enumerate(CATEGORIES) for j, q in enumerate(questions[cat])}
+
+
+def as_array(answers):
+    responses = engine.new_responses()
+    responses[:] = answers
+    return responses
+
+
+def responses(layout: str, likert, assessment) -> tuple:
+    if layout == "dict":
+        return as_dict(likert, LIKERT_QUESTIONS), as_dict(assessment, ASSESSMENT_QUESTIONS)
+    return as_array(likert), as_array(assessment)
+
+
+def session_state(layout: str, likert, assessment, now: float) -> dict:
+    """What app.py holds for one user after a submission (see init_state / compute_scores)."""
+    likert_r, assess_r = responses(layout, likert, assessment)
+    result = engine.score_session(
+        engine.responses_to_array(likert_r, LIKERT_QUESTIONS)[0],
+        engine.responses_to_array(assess_r, ASSESSMENT_QUESTIONS)[0],
+        now=now,
+    )
+    hist = ScoreHistory(HISTORY_WINDOW, len(CATEGORIES))
+    raw = [result["raw"][c] for c in CATEGORIES]
+    smoothed = [result["smoothed"][c] for c in CATEGORIES]
+    for i in range(HISTORY_WINDOW):
+        hist.append(now - (HISTORY_WINDOW - i) * 86400.0, raw, smoothed, result["scores"]["RGI"])
+    return {
+        "likert_responses": likert_r,
+        "assessment_responses": assess_r,
+        "raw_scores": result["raw"],
+        "scores": result["scores"],
+        "prev_scores": result["smoothed"],
+        "prev_scores_ts": result["ts"],
+        "score_history": hist,
+        "insights": insights.generate_insights(result["scores"]),
+    }
+
+
+def measure(build, n: int) -> float:
+    """Bytes still allocated per item after building n items with build(i)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(i) for i in range(n)]
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del items
+    return held / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=population.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    likert, assessment = population.answers(args.sessions, args.seed)
+    now = 1.7e9
+    session_state("array", likert[0], assessment[0], now)  # warm up module-level caches
+
+    print(f"{args.sessions:,} sessions, bytes per session")
+    print(f"{'layout':<8}{'answers':>10}{'session':>10}")
+    results = {}
+    for layout in ("dict", "array"):
+        answers = measure(lambda i: responses(layout, likert[i], assessment[i]), args.sessions)
+        total = measure(lambda i: session_state(layout, likert[i], assessment[i], now), args.sessions)
+        results[layout] = total
+        print(f"{layout:<8}{answers:>10,.0f}{total:>10,.0f}")
+    saved = results["dict"] - results["array"]
+    print(f"array layout saves {saved:,.0f} B per session ({saved * args.sessions / 2**20:,.1f} MiB "
+          f"per {args.sessions:,} sessions, {saved / results['dict']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Cold-start profile of a fresh worker, checked against a regression budget.
+
+Each sample is a new Python process that imports Streamlit's AppTest and runs
+app.py once on the entry page (the first request most workers serve). Reports
+time to first paint, whether matplotlib got imported, and the slowest imports
+(from `python -X importtime`). Exits non-zero when startup_budget.json is exceeded.
+
+    python benchmarks/startup.py --samples 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+BUDGET_FILE = Path(__file__).with_name("startup_budget.json")
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({{
+    "streamlit_import_ms": (t1 - t0) * 1e3,
+    "entry_first_run_ms": (t2 - t1) * 1e3,
+    "matplotlib_loaded_on_entry": "matplotlib" in sys.modules,
+    "page": at.session_state.page,
+}}))
+"""
+
+
+def run_child():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(app=str(ROOT / "app.py"))],
+        capture_output=True, text=True, check=True, cwd=ROOT,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = []
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit() and not name.startswith("  "):  # top-level packages only
+                imports.append((int(cumulative), name.strip()))
+    return result, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    results, imports = [], []
+    for _ in range(args.samples):
+        result, imports = run_child()
+        results.append(result)
+
+    report = {
+        "streamlit_import_ms": statistics.median(r["streamlit_import_ms"] for r in results),
+        "entry_first_run_ms": statistics.median(r["entry_first_run_ms"] for r in results),
+        "matplotlib_loaded_on_entry": any(r["matplotlib_loaded_on_entry"] for r in results),
+    }
+    print(json.dumps(report, indent=2))
+    print("slowest top-level imports (last sample, cumulative):")
+    for us, name in sorted(imports, reverse=True)[:args.top]:
+        print(f"  {us / 1e3:8.1f} ms  {name}")
+
+    budget = json.loads(BUDGET_FILE.read_text())
+    failures = []
+    for key, limit in budget.items():
+        value = report[key]
+        if isinstance(limit, bool) and value != limit:
+            failures.append(f"{key}: {value} (budget {limit})")
+        elif not isinstance(limit, bool) and value > limit:
+            failures.append(f"{key}: {value:.0f} ms (budget {limit} ms)")
+    if failures:
+        print("startup budget exceeded:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("startup budget: ok")
+
+
+if __name__ == "__main__":
+    main()
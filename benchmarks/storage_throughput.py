@@ -0,0 +1,89 @@
+"""Throughput of the SQLite user/score store under concurrent logins and score writes.
+
+Each thread loops over a mix of logins (password lookup), score writes and
+latest-snapshot reads (the smoothing query in compute_scores) against a fresh
+WAL database.
+
+    python benchmarks/storage_throughput.py --threads 1 2 4 8 16 --seconds 3
+"""
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from relatescore.storage import Storage  # noqa: E402
+
+CATEGORIES = [f"c{i}" for i in range(8)]
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def run(storage: Storage, users: int, threads: int, seconds: float, write_share: float):
+    latencies = {"login": [], "write": [], "latest": []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = {k: [] for k in latencies}
+        while time.perf_counter() < deadline:
+            name = f"user{rng.randrange(users)}"
+            x = rng.random()
+            t0 = time.perf_counter()
+            if x < write_share:
+                scores = {c: rng.uniform(20, 90) for c in CATEGORIES}
+                storage.append_scores(name, time.time(), scores, scores, 55.0)
+                kind = "write"
+            elif x < (1 + write_share) / 2:
+                storage.get_password(name)
+                kind = "login"
+            else:
+                storage.latest_scores(name)
+                kind = "latest"
+            local[kind].append(time.perf_counter() - t0)
+        with lock:
+            for k, v in local.items():
+                latencies[k].extend(v)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--write-share", type=float, default=0.25, help="fraction of ops that are score writes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(str(Path(tmp) / "bench.db"), pool_size=max(args.threads))
+        for i in range(args.users):
+            storage.create_user(f"user{i}", "pw")
+
+        print(f"{'threads':>8}{'ops/s':>10}{'login p50/p99 ms':>20}{'write p50/p99 ms':>20}{'latest p50/p99 ms':>20}")
+        for threads in args.threads:
+            lat = run(storage, args.users, threads, args.seconds, args.write_share)
+            total = sum(len(v) for v in lat.values())
+            cols = "".join(
+                f"{pct(lat[k], .5) * 1e3:>10.3f}/{pct(lat[k], .99) * 1e3:<9.3f}" for k in ("login", "write", "latest")
+            )
+            print(f"{threads:>8}{total / args.seconds:>10.0f}{cols}")
+        storage.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Micro-benchmark suite for the hot paths: scoring, insights, smoothing, wheel
+rendering, category colors and the invite store.
+
+Every case measures single-call latency (median of several timed runs) or batch
+throughput (items per second) on a fixed-seed synthetic population (see
+population.py), so two runs on the same box compare like for like.
+
+    python benchmarks/suite.py -o before.json
+    python benchmarks/suite.py -o after.json --compare before.json --threshold 10
+
+With --compare, cases that got worse by more than --threshold percent are
+listed and the exit status is 1. --quick shrinks populations for a smoke run;
+-k NAME runs only cases whose name contains NAME.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+logging.disable(logging.WARNING)  # bare-mode Streamlit warnings from importing app.py
+
+import app  # noqa: E402
+import population  # noqa: E402
+from relatescore import analytics, engine, insights, wheel  # noqa: E402
+from relatescore.history import ScoreHistory  # noqa: E402
+
+CASES = []
+
+
+def case(name: str, kind: str):
+    """Register a benchmark. kind="latency": fn() does one call, reported in us per call.
+    kind="throughput": fn(ctx) returns the number of items it processed."""
+    def wrap(fn):
+        CASES.append((name, kind, fn))
+        return fn
+    return wrap
+
+
+def time_latency(fn, repeat: int, min_time: float = 0.05) -> float:
+    """Median seconds per call; each run loops fn enough times to last about min_time."""
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - t0 >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        runs.append((time.perf_counter() - t0) / loops)
+    return statistics.median(runs)
+
+
+def time_throughput(fn, repeat: int) -> float:
+    """Median items per second over `repeat` runs."""
+    rates = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        items = fn()
+        rates.append(items / (time.perf_counter() - t0))
+    return statistics.median(rates)
+
+
+# -----------------------------
+# Fixtures
+# -----------------------------
+class Context:
+    def __init__(self, quick: bool, seed: int):
+        self.n_users = 20_000 if quick else 200_000
+        self.n_history_users, self.n_steps = (2_000, 20) if quick else (20_000, 20)
+        self.n_dicts = 200 if quick else 2_000
+        self.n_wheels = 3 if quick else 10
+        self.n_invites = 10_000 if quick else 100_000
+
+        self.likert, self.assessment = population.answers(self.n_users, seed)
+        self.raw_hist, self.ts_hist = population.histories(self.n_history_users, self.n_steps, seed)
+        self.score_dicts = population.score_dicts(self.n_dicts, seed)
+
+        # one session as app.compute_scores() sees it: (categories, questions) int8 answers
+        self.likert_responses = self.likert[0].copy()
+        self.assessment_responses = self.assessment[0].copy()
+        self.prev_scores = self.score_dicts[1]
+        self.prev_ts = 1.7e9
+        self.now = 1.7e9 + 86400.0
+        self.history = ScoreHistory()
+        self.codes = [f"C{i:07d}" for i in range(self.n_invites)]
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+@case("compute_scores.single", "latency")
+def bench_compute_scores_single(ctx):
+    # app.compute_scores() minus Streamlit session_state and the SQLite write
+    def run():
+        likert = engine.responses_to_array(ctx.likert_responses, engine.LIKERT_QUESTIONS)[0]
+        assess = engine.responses_to_array(ctx.assessment_responses, engine.ASSESSMENT_QUESTIONS)[0]
+        result = engine.score_session(likert, assess, ctx.prev_scores, ctx.prev_ts, now=ctx.now)
+        ctx.history.append(
+            result["ts"],
+            [result["raw"][c] for c in engine.CATEGORIES],
+            [result["smoothed"][c] for c in engine.CATEGORIES],
+            result["scores"]["RGI"],
+        )
+    return run
+
+
+@case("score_analytics.observe", "latency")
+def bench_score_analytics_observe(ctx):
+    # the per-submission sketch update at the end of app.compute_scores()
+    score_analytics = analytics.ScoreAnalytics(seed=0)
+    raw = ctx.raw_hist[0, 0].tolist()
+    smoothed = [ctx.score_dicts[0][c] for c in engine.CATEGORIES]
+    rgi = float(engine.batch_rgi(np.asarray(smoothed))[()])
+    return lambda: score_analytics.observe(raw, smoothed, rgi)
+
+
+@case("compute_scores.batch", "throughput")
+def bench_compute_scores_batch(ctx):
+    def run():
+        engine.compute_scores_batch(ctx.likert, ctx.assessment)
+        return ctx.n_users
+    return run
+
+
+@case("generate_insights.single", "latency")
+def bench_insights_single(ctx):
+    scores = ctx.score_dicts[0]
+    return lambda: insights.generate_insights(scores)
+
+
+@case("generate_insights.batch", "throughput")
+def bench_insights_batch(ctx):
+    raw, _ = engine.compute_scores_batch(ctx.likert, ctx.assessment)
+
+    def run():
+        insights.batch_insights(raw)
+        return ctx.n_users
+    return run
+
+
+# -----------------------------
+# Smoothing
+# -----------------------------
+@case("smooth_scores.single", "latency")
+def bench_smooth_single(ctx):
+    new = ctx.score_dicts[0]
+    return lambda: engine.smooth_scores(new, ctx.prev_scores, ctx.prev_ts, ctx.now)
+
+
+@case("smooth_scores.batch", "throughput")
+def bench_smooth_batch(ctx):
+    new = ctx.raw_hist[:, 1, :]
+    prev = ctx.raw_hist[:, 0, :]
+
+    def run():
+        engine.smooth_scores_batch(new, prev, ctx.ts_hist[:, 0], ctx.ts_hist[:, 1])
+        return ctx.n_history_users
+    return run
+
+
+def check_replay_parity(raw, ts, tol: float = 1e-9) -> int:
+    """Assert replay_smoothing() equals step-by-step smooth_scores(..., now=ts); returns steps checked."""
+    out = engine.replay_smoothing(raw, ts)
+    checked = 0
+    for u in range(raw.shape[0]):
+        prev, prev_ts = None, None
+        for t in range(raw.shape[1]):
+            if np.isnan(ts[u, t]):
+                assert np.isnan(out[u, t]).all(), (u, t)
+                continue
+            new = dict(zip(engine.CATEGORIES, raw[u, t].tolist()))
+            prev = engine.smooth_scores(new, prev, prev_ts, now=float(ts[u, t]))
+            prev_ts = float(ts[u, t])
+            np.testing.assert_allclose(out[u, t], [prev[c] for c in engine.CATEGORIES], rtol=0, atol=tol,
+                                       err_msg=f"user {u}, step {t}")
+            checked += 1
+    return checked
+
+
+@case("smooth_scores.replay", "throughput")
+def bench_smooth_replay(ctx):
+    # parity first, on a slice with NaN padding (shorter histories, a skipped step) and
+    # sub-minute gaps, where the elapsed-time cap hits its floor
+    raw = ctx.raw_hist[:300, :12].copy()
+    ts = ctx.ts_hist[:300, :12].copy()
+    ts[::7] = ts[::7, :1] + 20.0 * np.arange(ts.shape[1])  # 20 s apart
+    ts[::5, 9:] = np.nan
+    ts[::11, 4] = np.nan
+    check_replay_parity(raw, ts)
+
+    def run():
+        engine.replay_smoothing(ctx.raw_hist, ctx.ts_hist)
+        return ctx.n_history_users * ctx.n_steps
+    return run
+
+
+# -----------------------------
+# RQ Wheel
+# -----------------------------
+@case("draw_rq_wheel.single", "latency")
+def bench_wheel_single(ctx):
+    # uncached render: draw + PNG encode, what a wheel cache miss costs
+    scores = ctx.score_dicts[0]
+    return lambda: app._render_rq_wheel_png(engine.CATEGORIES, scores)
+
+
+@case("draw_rq_wheel.batch", "throughput")
+def bench_wheel_batch(ctx):
+    def run():
+        for scores in ctx.score_dicts[:ctx.n_wheels]:
+            app._render_rq_wheel_png(engine.CATEGORIES, scores)
+        return ctx.n_wheels
+    return run
+
+
+@case("draw_rq_wheel.draw", "latency")
+def bench_wheel_draw(ctx):
+    # artists + rasterization only, on a reused figure: no PNG encode
+    plt = app._pyplot()
+    fig, ax = plt.subplots(figsize=(6.3, 6.3), subplot_kw=dict(polar=True))
+    scores = ctx.score_dicts[0]
+
+    def run():
+        ax.clear()
+        wheel.draw_rq_wheel(ax, engine.CATEGORIES, scores)
+        fig.canvas.draw()
+    return run
+
+
+@case("draw_rq_wheel_svg.single", "latency")
+def bench_wheel_svg_single(ctx):
+    scores = ctx.score_dicts[0]
+    return lambda: wheel.draw_rq_wheel_svg(engine.CATEGORIES, scores)
+
+
+@case("draw_rq_wheel_svg.batch", "throughput")
+def bench_wheel_svg_batch(ctx):
+    def run():
+        for scores in ctx.score_dicts:
+            wheel.draw_rq_wheel_svg(engine.CATEGORIES, scores)
+        return len(ctx.score_dicts)
+    return run
+
+
+@case("category_dynamic_color.single", "latency")
+def bench_color_single(ctx):
+    return lambda: wheel._category_dynamic_color("Self-Insight", 63.4)
+
+
+@case("wheel_colors.single", "latency")
+def bench_wheel_colors(ctx):
+    # one wheel's wedge colors from the lookup tables (means of one-decimal scores)
+    scores = [round(ctx.score_dicts[0][c], 1) for c in engine.CATEGORIES]
+    means = [(a + b) / 2.0 for a, b in zip(scores, scores[1:] + scores[:1])]
+    return lambda: wheel.wheel_colors(engine.CATEGORIES, means)
+
+
+@case("category_dynamic_color.batch", "throughput")
+def bench_color_batch(ctx):
+    def run():
+        for scores in ctx.score_dicts:
+            for cat in engine.CATEGORIES:
+                wheel._category_dynamic_color(cat, scores[cat])
+        return len(ctx.score_dicts) * len(engine.CATEGORIES)
+    return run
+
+
+# -----------------------------
+# Invite store
+# -----------------------------
+def _filled_store(ctx) -> app.InviteStore:
+    store = app.InviteStore()
+    for i, code in enumerate(ctx.codes):
+        store.register(code, now=ctx.now + i * 1e-3)
+    return store
+
+
+@case("invite.validate.single", "latency")
+def bench_invite_validate(ctx):
+    store = _filled_store(ctx)
+    code = ctx.codes[len(ctx.codes) // 2]
+    return lambda: store.validate(code, now=ctx.now + 120.0)
+
+
+@case("invite.register_validate_consume.batch", "throughput")
+def bench_invite_lifecycle(ctx):
+    def run():
+        store = app.InviteStore()
+        now = ctx.now
+        for code in ctx.codes:
+            store.register(code, now=now)
+        for code in ctx.codes:
+            ok, _ = store.validate(code, now=now + 60.0)
+            if ok:
+                store.consume(code)
+        return len(ctx.codes)
+    return run
+
+
+@case("invite.purge_expired.batch", "throughput")
+def bench_invite_purge(ctx):
+    def run():
+        store = _filled_store(ctx)
+        store.purge_expired(ctx.now + store.ttl_seconds + len(ctx.codes))
+        return len(ctx.codes)
+    return run
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(quick: bool, seed: int, repeat: int, pattern: str | None) -> dict:
+    ctx = Context(quick, seed)
+    results = {}
+    for name, kind, factory in CASES:
+        if pattern and pattern not in name:
+            continue
+        fn = factory(ctx)
+        if kind == "latency":
+            value = time_latency(fn, repeat) * 1e6
+            results[name] = {"kind": kind, "value": value, "unit": "us/call", "better": "lower"}
+        else:
+            value = time_throughput(fn, repeat)
+            results[name] = {"kind": kind, "value": value, "unit": "items/s", "better": "higher"}
+        print(f"{name:<42}{value:>16,.2f} {results[name]['unit']}", flush=True)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "seed": seed,
+            "quick": quick,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Names of cases more than `threshold` percent worse than in `baseline`, printed with the change."""
+    regressions = []
+    print(f"\n{'case':<42}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        # positive change = slower, whichever direction the metric runs
+        if cur["better"] == "lower":
+            change = (cur["value"] / base["value"] - 1.0) * 100.0
+        else:
+            change = (base["value"] / cur["value"] - 1.0) * 100.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<42}{base['value']:>14,.2f}{cur['value']:>14,.2f}{change:>+9.1f}%{flag}")
+        if flag:
+            regressions.append(name)
+    if baseline["meta"].get("quick") != current["meta"].get("quick"):
+        print("note: baseline and current runs used different population sizes (--quick)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--compare", metavar="BASELINE", help="results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--seed", type=int, default=population.DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (median is reported)")
+    parser.add_argument("--quick", action="store_true", help="smaller populations, for a smoke run")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.quick, args.seed, args.repeat, args.pattern)
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:g}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""RQ Wheel renderers: geometry parity check and matplotlib vs SVG timing.
+
+    python benchmarks/wheel_render.py --iterations 50
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+logging.disable(logging.WARNING)  # bare-mode Streamlit warnings from importing app.py
+
+import app  # noqa: E402
+from relatescore import wheel  # noqa: E402
+
+
+def random_scores(rng) -> dict:
+    # rounded to WHEEL_SCORE_DECIMALS, as render_rq_wheel passes them
+    return {c: round(float(v), app.WHEEL_SCORE_DECIMALS) for c, v in zip(app.CATEGORIES, rng.uniform(20, 90, len(app.CATEGORIES)))}
+
+
+def check_parity(scores: dict, tol: float = 1e-9) -> None:
+    """Compare draw_rq_wheel's artists (in display space) with wheel_geometry()."""
+    import matplotlib.colors as mcolors
+
+    plt = app._pyplot()
+    fig, ax = plt.subplots(figsize=(6.3, 6.3), subplot_kw=dict(polar=True), dpi=72)
+    wheel.draw_rq_wheel(ax, app.CATEGORIES, scores)
+    fig.canvas.draw()
+
+    center = ax.transData.transform([(0.0, 0.0)])[0]
+    radius = ax.transData.transform([(0.0, 110.0)])[0][1] - center[1]
+    assert abs(radius - wheel.WHEEL_SVG_RADIUS_PT) < 1e-3, radius
+
+    def to_unit(theta_r):
+        return (ax.transData.transform(np.asarray(theta_r, dtype=float)) - center) / radius * 110.0
+
+    g = wheel.wheel_geometry(app.CATEGORIES, scores)
+    n = len(app.CATEGORIES)
+    verts = g["vertices"]
+
+    radial, wedges = ax.collections[0], ax.collections[1]
+    for i, segment in enumerate(radial.get_segments()):
+        np.testing.assert_allclose(to_unit(segment)[1], verts[i], atol=tol)
+    np.testing.assert_allclose(to_unit(np.column_stack(ax.lines[0].get_data()))[:n], verts, atol=tol)
+
+    for i, path in enumerate(wedges.get_paths()):
+        pts = to_unit(path.vertices)
+        np.testing.assert_allclose(pts[1], verts[i], atol=tol)
+        np.testing.assert_allclose(pts[2], verts[(i + 1) % n], atol=tol)
+    np.testing.assert_allclose(wedges.get_facecolor()[:, :3], [mcolors.to_rgb(c) for c in g["colors"]], atol=1e-6)
+    for i, c in enumerate(app.CATEGORIES):
+        assert g["colors"][i] == wheel._category_dynamic_color(c, (scores[c] + scores[app.CATEGORIES[(i + 1) % n]]) / 2)
+
+    for i in range(n):
+        hex_text, label_text = ax.texts[2 * i], ax.texts[2 * i + 1]
+        np.testing.assert_allclose(to_unit([hex_text.get_position()])[0], g["hex_xy"][i], atol=tol)
+        np.testing.assert_allclose(to_unit([label_text.get_position()])[0], g["label_xy"][i], atol=tol)
+        assert hex_text.get_text() == g["hex_codes"][i]
+        assert label_text.get_text() == wheel.format_label(app.CATEGORIES[i])
+    plt.close(fig)
+
+
+def time_calls(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for _ in range(20):
+        check_parity(random_scores(rng))
+    print("geometry and color parity: ok (20 random score vectors)")
+
+    scores = random_scores(rng)
+    mpl = time_calls(lambda: app._render_rq_wheel_png(app.CATEGORIES, scores), args.iterations)
+    svg = time_calls(lambda: wheel.draw_rq_wheel_svg(app.CATEGORIES, scores), args.iterations)
+    print(f"{'renderer':<12}{'median ms':>12}{'bytes':>10}")
+    print(f"{'matplotlib':<12}{mpl * 1e3:>12.2f}{len(app._render_rq_wheel_png(app.CATEGORIES, scores)):>10}")
+    print(f"{'svg':<12}{svg * 1e3:>12.3f}{len(wheel.draw_rq_wheel_svg(app.CATEGORIES, scores)):>10}")
+    print(f"speedup: {mpl / svg:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
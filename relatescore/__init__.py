@@ -0,0 +1 @@
+"""RelateScore™ building blocks that do not depend on Streamlit."""
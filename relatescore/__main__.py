@@ -0,0 +1,5 @@
+import sys
+
+from relatescore.cli import main
+
+sys.exit(main())
@@ -0,0 +1,353 @@
+"""Internal score distributions kept as mergeable streaming quantile sketches.
+
+Every scored submission updates, per worker process:
+
+    RGI               the RGI shown to the user
+    score:<category>  the smoothed category score
+    delta:<category>  smoothed - raw, i.e. how far smoothing moved the score
+
+Each series is a KLL sketch (Karnin, Lang, Liberty 2016): levels of sorted
+buffers where an item on level h stands for 2**h observations. A full level is
+compacted by keeping every other item (from a random offset) and promoting
+them one level up. With accuracy parameter k a sketch retains about 3k items
+plus two per level, whatever the number of observations; ranks are off by
+about 1.7 / k of the count (1% at the default k=200).
+
+Two sketches merge by concatenating their levels and compacting, so per-worker
+snapshots combine into one population distribution:
+
+    RELATESCORE_ANALYTICS_DIR=/path   write this process's snapshot to
+                                      /path/scores-<host>-<pid>-<start>.json
+                                      every RELATESCORE_ANALYTICS_INTERVAL s (60)
+    python -m relatescore analytics /path [--baseline OLD_DIR]
+
+Snapshots record the RGI weights they were taken under. Only snapshots with the
+same weights merge; comparing two sets (--baseline) reports the largest CDF
+gap (Kolmogorov-Smirnov distance) and the median shift per series, e.g. to see
+the drift after a weighting change. Nothing here is shown to users.
+"""
+import json
+import logging
+import math
+import os
+import random
+import socket
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from relatescore.engine import CATEGORIES, RGI_WEIGHTS
+
+ANALYTICS_DIR = os.environ.get("RELATESCORE_ANALYTICS_DIR") or None
+ANALYTICS_INTERVAL = float(os.environ.get("RELATESCORE_ANALYTICS_INTERVAL", 60))
+ANALYTICS_K = int(os.environ.get("RELATESCORE_ANALYTICS_K", 200))
+
+CAPACITY_DECAY = 2.0 / 3.0   # each level below the top holds 2/3 of the one above
+MIN_LEVEL_CAPACITY = 2
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+SNAPSHOT_VERSION = 1
+
+log = logging.getLogger(__name__)
+
+
+class KLLSketch:
+    """Streaming quantiles over floats in O(k) memory; update() is amortized O(1).
+
+    min, max, count and sum are exact; quantile() and cdf() are estimates.
+    """
+
+    def __init__(self, k: int = ANALYTICS_K, seed=None):
+        if k < MIN_LEVEL_CAPACITY:
+            raise ValueError(f"k must be at least {MIN_LEVEL_CAPACITY}")
+        self.k = k
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._levels = [[]]  # level h: items of weight 2**h, unsorted until compacted
+        self._size = 0       # items retained over all levels
+        self._max_size = self._capacity(0)
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        """Items retained (not the number of observations; see count)."""
+        return self._size
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(MIN_LEVEL_CAPACITY, int(math.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+
+    def _compress(self) -> None:
+        for h, items in enumerate(self._levels):
+            if len(items) < self._capacity(h):
+                continue
+            if h + 1 == len(self._levels):
+                self._grow()
+            items.sort()
+            odd = len(items) % 2  # an odd item out stays on this level
+            self._levels[h + 1].extend(items[odd + self._rng.getrandbits(1)::2])
+            self._levels[h] = items[:odd]
+            self._size = sum(map(len, self._levels))
+            if self._size < self._max_size:
+                return
+
+    def update(self, value: float) -> None:
+        """Add one observation; NaN and infinities are ignored."""
+        value = float(value)
+        if not math.isfinite(value):
+            return
+        self._levels[0].append(value)
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold `other` into this sketch (other is left unchanged)."""
+        if other.k != self.k:
+            raise ValueError(f"cannot merge sketches with k={self.k} and k={other.k}")
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for mine, theirs in zip(self._levels, other._levels):
+            mine.extend(theirs)
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._size = sum(map(len, self._levels))
+        while self._size >= self._max_size:
+            self._compress()
+
+    def _weighted(self):
+        """Retained items in order and their cumulative weights."""
+        values = np.fromiter((v for level in self._levels for v in level), dtype=float, count=self._size)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self._levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Estimated values at quantiles `qs` (0..1); q=0 and q=1 are the exact min and max."""
+        qs = np.clip(np.asarray(qs, dtype=float), 0.0, 1.0)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        values, cum = self._weighted()
+        idx = np.minimum(np.searchsorted(cum, qs * cum[-1], side="left"), len(values) - 1)
+        out = values[idx]
+        out[qs == 0.0] = self.min
+        out[qs == 1.0] = self.max
+        return out
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def cdf(self, xs) -> np.ndarray:
+        """Estimated fraction of observations <= each of `xs`."""
+        xs = np.asarray(xs, dtype=float)
+        if self.count == 0:
+            return np.full(xs.shape, np.nan)
+        values, cum = self._weighted()
+        idx = np.searchsorted(values, xs, side="right")
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0) / cum[-1]
+
+    def to_dict(self) -> dict:
+        """JSON-serializable copy; KLLSketch.from_dict() restores it."""
+        return {
+            "k": self.k,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "levels": [list(level) for level in self._levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, seed=None) -> "KLLSketch":
+        sketch = cls(data["k"], seed=seed)
+        for _ in range(len(data["levels"]) - 1):
+            sketch._grow()
+        sketch._levels = [[float(v) for v in level] for level in data["levels"]]
+        sketch._size = sum(map(len, sketch._levels))
+        sketch.count = int(data["count"])
+        sketch.sum = float(data["sum"])
+        if sketch.count:
+            sketch.min, sketch.max = float(data["min"]), float(data["max"])
+        return sketch
+
+
+def ks_distance(a: KLLSketch, b: KLLSketch) -> float:
+    """Largest gap between the two estimated CDFs (0 = same distribution, 1 = disjoint)."""
+    if a.count == 0 or b.count == 0:
+        return math.nan
+    points = np.union1d(a._weighted()[0], b._weighted()[0])
+    return float(np.max(np.abs(a.cdf(points) - b.cdf(points))))
+
+
+def series_names(categories=CATEGORIES) -> list:
+    return ["RGI"] + [f"score:{c}" for c in categories] + [f"delta:{c}" for c in categories]
+
+
+class ScoreAnalytics:
+    """The RGI, score and smoothing-delta sketches of one process, behind one lock."""
+
+    def __init__(self, categories=CATEGORIES, k: int = ANALYTICS_K, seed=None):
+        self.categories = tuple(categories)
+        self.k = k
+        self.weights = [float(w) for w in RGI_WEIGHTS]
+        self.started_at = time.time()
+        rng = random.Random(seed)
+        self.sketches = {name: KLLSketch(k, seed=rng.random()) for name in series_names(self.categories)}
+        self._bind()
+        self._lock = threading.Lock()
+
+    def _bind(self) -> None:
+        """Direct references to the sketches observe() updates, in category order."""
+        self._rgi = self.sketches["RGI"]
+        self._scores = [self.sketches[f"score:{c}"] for c in self.categories]
+        self._deltas = [self.sketches[f"delta:{c}"] for c in self.categories]
+
+    def observe(self, raw, smoothed, rgi: float) -> None:
+        """Record one submission: raw and smoothed scores in category order, and its RGI."""
+        with self._lock:
+            self._rgi.update(rgi)
+            for score_sketch, delta_sketch, r, s in zip(self._scores, self._deltas, raw, smoothed):
+                score_sketch.update(s)
+                delta_sketch.update(s - r)
+
+    @property
+    def count(self) -> int:
+        return self._rgi.count
+
+    def merge(self, other: "ScoreAnalytics") -> None:
+        if other.weights != self.weights or other.categories != self.categories:
+            raise ValueError("cannot merge analytics taken under different categories or RGI weights")
+        with self._lock:
+            for name, sketch in self.sketches.items():
+                sketch.merge(other.sketches[name])
+            self.started_at = min(self.started_at, other.started_at)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable state; its size depends on k, not on the number of submissions."""
+        with self._lock:
+            sketches = {name: sketch.to_dict() for name, sketch in self.sketches.items()}
+        return {
+            "version": SNAPSHOT_VERSION,
+            "categories": list(self.categories),
+            "weights": self.weights,
+            "k": self.k,
+            "started_at": self.started_at,
+            "taken_at": time.time(),
+            "sketches": sketches,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snap: dict) -> "ScoreAnalytics":
+        if snap.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported analytics snapshot version {snap.get('version')!r}")
+        analytics = cls(snap["categories"], snap["k"])
+        analytics.weights = [float(w) for w in snap["weights"]]
+        analytics.started_at = snap["started_at"]
+        for name in analytics.sketches:
+            analytics.sketches[name] = KLLSketch.from_dict(snap["sketches"][name])
+        analytics._bind()
+        return analytics
+
+    def summary(self, quantiles=DEFAULT_QUANTILES) -> dict:
+        """{series: {"count", "sum", "min", "max", "quantiles": {q: value}}}."""
+        with self._lock:
+            out = {}
+            for name, sketch in self.sketches.items():
+                values = sketch.quantiles(quantiles).tolist()
+                out[name] = {
+                    "count": sketch.count,
+                    "sum": sketch.sum,
+                    "min": sketch.min if sketch.count else None,
+                    "max": sketch.max if sketch.count else None,
+                    "quantiles": dict(zip(quantiles, values)),
+                }
+            return out
+
+
+def labelled_summary(analytics: ScoreAnalytics, quantiles=DEFAULT_QUANTILES) -> dict:
+    """{(series, category): (count, sum, {q: value})} for metrics.CallbackSummary; empty series are left out."""
+    out = {}
+    for name, s in analytics.summary(quantiles).items():
+        if s["count"]:
+            series, _, category = name.partition(":")
+            out[(series.lower(), category)] = (s["count"], s["sum"], s["quantiles"])
+    return out
+
+
+def drift(baseline: ScoreAnalytics, current: ScoreAnalytics) -> dict:
+    """{series: {"ks": CDF distance, "median_shift": current - baseline median}}."""
+    out = {}
+    for name, before in baseline.sketches.items():
+        after = current.sketches.get(name)
+        if after is None:
+            continue
+        out[name] = {
+            "ks": ks_distance(before, after),
+            "median_shift": after.quantile(0.5) - before.quantile(0.5),
+        }
+    return out
+
+
+# -----------------------------
+# Snapshot files (one per worker process)
+# -----------------------------
+def snapshot_path(directory: str, analytics: ScoreAnalytics) -> Path:
+    return Path(directory) / f"scores-{socket.gethostname()}-{os.getpid()}-{int(analytics.started_at)}.json"
+
+
+def write_snapshot(analytics: ScoreAnalytics, path) -> None:
+    """Atomically replace `path` with the current snapshot."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(analytics.snapshot()), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _snapshot_writer(analytics: ScoreAnalytics, path: Path, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            write_snapshot(analytics, path)
+        except OSError as exc:  # keep snapshotting once the directory is writable again
+            log.warning("could not write analytics snapshot %s: %s", path, exc)
+
+
+def start_snapshot_writer(analytics: ScoreAnalytics, directory: str = ANALYTICS_DIR,
+                          interval: float = ANALYTICS_INTERVAL) -> Path:
+    """Rewrite this process's snapshot file every `interval` seconds on a daemon thread."""
+    path = snapshot_path(directory, analytics)
+    threading.Thread(target=_snapshot_writer, args=(analytics, path, interval),
+                     name="analytics-snapshot", daemon=True).start()
+    return path
+
+
+def load(paths) -> ScoreAnalytics:
+    """Merge snapshot files (or directories of them) into one ScoreAnalytics."""
+    files = []
+    for p in map(Path, paths):
+        files.extend(sorted(p.glob("scores-*.json")) if p.is_dir() else [p])
+    if not files:
+        raise ValueError("no analytics snapshots found")
+    merged = None
+    for f in files:
+        analytics = ScoreAnalytics.from_snapshot(json.loads(f.read_text(encoding="utf-8")))
+        if merged is None:
+            merged = analytics
+        else:
+            merged.merge(analytics)
+    return merged
@@ -0,0 +1,102 @@
+"""Password hashing on a bounded worker pool, plus short-lived verified-session tokens.
+
+PBKDF2 (hashlib) releases the GIL while it runs, so a thread pool is enough to
+keep the KDF off the Streamlit script threads' CPU budget and to cap how many
+hashes run at once during a login burst.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ALGORITHM = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = 200_000
+SALT_BYTES = 16
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def hash_password(password: str, iterations: int = DEFAULT_ITERATIONS) -> str:
+    """Encode as "pbkdf2_sha256$<iterations>$<salt>$<hash>" (base64 salt/hash)."""
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    if not stored.startswith(ALGORITHM + "$"):
+        # Accounts created before hashing stored the password itself
+        return hmac.compare_digest(password.encode(), stored.encode())
+    _, iterations, salt, expected = stored.split("$")
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+def needs_rehash(stored: str, iterations: int = DEFAULT_ITERATIONS) -> bool:
+    """True for legacy plain-text entries and hashes made with a different cost."""
+    if not stored.startswith(ALGORITHM + "$"):
+        return True
+    return int(stored.split("$")[1]) != iterations
+
+
+class PasswordHasher:
+    """Runs hash/verify on at most `workers` threads; callers wait on the result."""
+
+    def __init__(self, iterations: int = DEFAULT_ITERATIONS, workers: int | None = None):
+        self.iterations = iterations
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+
+    def hash(self, password: str) -> str:
+        return self._pool.submit(hash_password, password, self.iterations).result()
+
+    def verify(self, password: str, stored: str) -> bool:
+        return self._pool.submit(verify_password, password, stored).result()
+
+    def needs_rehash(self, stored: str) -> bool:
+        return needs_rehash(stored, self.iterations)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+class SessionTokens:
+    """Stateless HMAC tokens proving a recent successful login.
+
+    Checking one is a single HMAC over a short string, so reruns can trust it
+    instead of running the KDF again. Tokens die with the process secret.
+    """
+
+    def __init__(self, ttl_seconds: float = 15 * 60, secret: bytes | None = None):
+        self.ttl_seconds = ttl_seconds
+        self._secret = secret or secrets.token_bytes(32)
+
+    def _sign(self, username: str, expires: int) -> str:
+        msg = f"{username}\n{expires}".encode()
+        return hmac.new(self._secret, msg, hashlib.sha256).hexdigest()
+
+    def issue(self, username: str, now: float | None = None) -> str:
+        expires = int((time.time() if now is None else now) + self.ttl_seconds)
+        return f"{expires}.{self._sign(username, expires)}"
+
+    def verify(self, token: str | None, username: str | None, now: float | None = None) -> bool:
+        if not token or not username:
+            return False
+        expires, _, signature = token.partition(".")
+        if not expires.isdigit() or int(expires) < (time.time() if now is None else now):
+            return False
+        return hmac.compare_digest(signature, self._sign(username, int(expires)))
+
+    def refresh(self, token: str | None, username: str | None, now: float | None = None) -> str | None:
+        """None if `token` is not valid for `username`; else `token`, or a new one once half its lifetime is gone."""
+        now = time.time() if now is None else now
+        if not self.verify(token, username, now):
+            return None
+        if int(token.partition(".")[0]) - now > self.ttl_seconds / 2:
+            return token
+        return self.issue(username, now)
@@ -0,0 +1,209 @@
+"""Streaming JSONL batch scoring, and reports on the app's score analytics.
+
+    python -m relatescore score [INPUT.jsonl] [-o OUTPUT.jsonl] [--batch-size N] [--carry-state]
+    python -m relatescore analytics SNAPSHOT_DIR [--baseline OLD_DIR] [--json]
+
+Input records (one JSON object per line; "-" or no INPUT reads stdin):
+
+    {"id": "...", "user": "...", "ts": 1700000000.0,
+     "likert": [[1, 2, 3], ...],        # 8 x 3 answers in CATEGORIES order,
+     "assessment": {"Emotional Awareness": [4, 4, 5], ...},   # or {category: [answers]}
+     "prev_scores": {"Emotional Awareness": 61.2, ...},        # optional
+     "prev_ts": 1699000000.0,                                  # optional
+     "mutual": [55.0, ...]}                                    # optional partner scores
+
+Each output line carries id/user, ts, raw, scores (smoothed + "RGI") and insights.
+Records are scored in fixed-size batches, so memory stays bounded by --batch-size
+(plus one snapshot per user with --carry-state).
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from relatescore import analytics, engine, insights
+
+N_CATS = len(engine.CATEGORIES)
+
+
+ANSWERS_SHAPE = (N_CATS, engine.QUESTIONS_PER_CATEGORY)
+
+
+def _number(value, name: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"{name} must be a number, got {type(value).__name__}")
+    return float(value)
+
+
+def _vector(value, shape: tuple, name: str) -> np.ndarray:
+    """`value` as a finite float array of exactly `shape`."""
+    arr = np.asarray(value, dtype=float)
+    if arr.shape != shape:
+        raise ValueError(f"{name} must have shape {shape}, got {arr.shape}")
+    if not np.isfinite(arr).all():
+        raise ValueError(f"{name} must hold finite numbers")
+    return arr
+
+
+def _answers(value, name: str) -> np.ndarray:
+    if isinstance(value, dict):
+        value = [value[cat] for cat in engine.CATEGORIES]
+    return _vector(value, ANSWERS_SHAPE, name)
+
+
+def _scores_vector(scores) -> np.ndarray:
+    if not scores:
+        return np.full(N_CATS, np.nan)
+    if not isinstance(scores, dict):
+        raise TypeError(f"prev_scores must be an object of category scores, got {type(scores).__name__}")
+    return np.array([_number(scores[cat], f"prev_scores[{cat!r}]") if cat in scores else np.nan
+                     for cat in engine.CATEGORIES])
+
+
+def parse_record(record) -> dict:
+    """Validate one input record and convert it to the arrays score_batch() expects.
+
+    Raises ValueError / KeyError / TypeError for a record that cannot be scored.
+    """
+    if not isinstance(record, dict):
+        raise TypeError(f"expected a JSON object, got {type(record).__name__}")
+    parsed = {k: record[k] for k in ("id", "user") if k in record}
+    user = parsed.get("user")
+    if user is not None and (isinstance(user, bool) or not isinstance(user, (str, int))):
+        raise TypeError(f"user must be a string or an integer, got {type(user).__name__}")
+    parsed["ts"] = _number(record["ts"], "ts") if "ts" in record else time.time()
+    parsed["likert"] = _answers(record["likert"], "likert")
+    parsed["assessment"] = _answers(record["assessment"], "assessment")
+    mutual = record.get("mutual")
+    parsed["mutual"] = np.full(N_CATS, np.nan) if mutual is None else _vector(mutual, (N_CATS,), "mutual")
+    parsed["prev_scores"] = _scores_vector(record.get("prev_scores"))
+    prev_ts = record.get("prev_ts")
+    parsed["prev_ts"] = np.nan if prev_ts is None else _number(prev_ts, "prev_ts")
+    return parsed
+
+
+def score_batch(records: list, with_insights: bool = True) -> list:
+    """Score records from parse_record() in one vectorized pass; same numbers as engine.score_session()."""
+    n = len(records)
+    likert = np.stack([r["likert"] for r in records])
+    assessment = np.stack([r["assessment"] for r in records])
+    mutual = np.stack([r["mutual"] for r in records])
+    prev = np.stack([r["prev_scores"] for r in records])
+    prev_ts = np.array([r["prev_ts"] or np.nan for r in records], dtype=float)
+    now = np.array([r["ts"] for r in records], dtype=float)
+
+    raw = engine.batch_category_scores(likert, assessment, mutual)
+    smoothed = engine.smooth_scores_batch(raw, prev, prev_ts, now)
+    rgi = engine.batch_rgi(smoothed)
+    labels = insights.batch_insights(smoothed) if with_insights else None
+
+    out = []
+    for i in range(n):
+        scores = dict(zip(engine.CATEGORIES, smoothed[i].tolist()))
+        scores["RGI"] = float(rgi[i])
+        row = {k: records[i][k] for k in ("id", "user") if k in records[i]}
+        row["ts"] = float(now[i])
+        row["raw"] = dict(zip(engine.CATEGORIES, raw[i].tolist()))
+        row["scores"] = scores
+        if with_insights:
+            row["insights"] = labels[i].tolist()
+        out.append(row)
+    return out
+
+
+def run(lines, out, batch_size: int = 4096, carry_state: bool = False, with_insights: bool = True) -> dict:
+    """Stream JSONL `lines` to `out`. Returns counters; bad lines are reported on stderr and skipped."""
+    state = {}  # user -> (smoothed scores, ts), only with carry_state
+    batch, batch_users = [], set()
+    counts = {"scored": 0, "errors": 0}
+
+    def flush():
+        for row in score_batch(batch, with_insights):
+            if carry_state and "user" in row:
+                state[row["user"]] = (np.array([row["scores"][c] for c in engine.CATEGORIES]), row["ts"])
+            out.write(json.dumps(row) + "\n")
+        counts["scored"] += len(batch)
+        batch.clear()
+        batch_users.clear()
+
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            raw_record = json.loads(line)
+            record = parse_record(raw_record)
+        except (ValueError, KeyError, TypeError) as exc:
+            counts["errors"] += 1
+            print(f"line {lineno}: {exc!r}", file=sys.stderr)
+            continue
+
+        user = record.get("user")
+        if carry_state and user is not None:
+            if user in batch_users:
+                flush()  # a user's next record depends on this batch's result
+            if "prev_scores" not in raw_record and user in state:
+                record["prev_scores"], record["prev_ts"] = state[user]
+            batch_users.add(user)
+
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return counts
+
+
+def analytics_report(paths, baseline_paths=None, quantiles=analytics.DEFAULT_QUANTILES, as_json: bool = False) -> str:
+    """Merge worker snapshots (see relatescore/analytics.py) into a quantile table, with drift
+    against a baseline set when given."""
+    merged = analytics.load(paths)
+    summary = merged.summary(quantiles)
+    drift = analytics.drift(analytics.load(baseline_paths), merged) if baseline_paths else None
+    if as_json:
+        return json.dumps({"summary": summary, "drift": drift}, indent=2)
+
+    head = f"{'series':<34}{'count':>9}" + "".join(f"{f'p{q * 100:g}':>8}" for q in quantiles)
+    if drift:
+        head += f"{'ks':>8}{'d p50':>8}"
+    lines = [head]
+    for name, s in summary.items():
+        row = f"{name:<34}{s['count']:>9}" + "".join(f"{v:>8.1f}" for v in s["quantiles"].values())
+        if drift and name in drift:
+            row += f"{drift[name]['ks']:>8.3f}{drift[name]['median_shift']:>+8.1f}"
+        lines.append(row)
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m relatescore", description="RelateScore batch tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    score = sub.add_parser("score", help="score JSONL assessment records")
+    score.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin (default)")
+    score.add_argument("-o", "--output", default="-", help="JSONL file, or - for stdout (default)")
+    score.add_argument("--batch-size", type=int, default=4096)
+    score.add_argument("--carry-state", action="store_true",
+                       help="smooth each user's records against their previous output record")
+    score.add_argument("--no-insights", action="store_true")
+    report = sub.add_parser("analytics", help="merge the app's score analytics snapshots and print quantiles")
+    report.add_argument("paths", nargs="+", help="snapshot files or RELATESCORE_ANALYTICS_DIR directories")
+    report.add_argument("--baseline", nargs="+", help="earlier snapshots to measure drift against")
+    report.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "analytics":
+        print(analytics_report(args.paths, args.baseline, as_json=args.json))
+        return 0
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        counts = run(src, dst, args.batch_size, args.carry_state, not args.no_insights)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    print(f"scored {counts['scored']} records, {counts['errors']} errors", file=sys.stderr)
+    return 1 if counts["errors"] else 0
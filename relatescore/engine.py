@@ -0,0 +1,340 @@
+"""Headless RelateScore™ scoring engine.
+
+Pure functions over explicit inputs and previous state: no Streamlit, no
+session_state, no plotting. app.py wraps these for the live UI; the batch CLI
+(python -m relatescore) uses them offline.
+"""
+import time
+
+import numpy as np
+
+# -----------------------------
+# Data
+# -----------------------------
+CATEGORIES = [
+    "Emotional Awareness",
+    "Communication Style",
+    "Conflict Tendencies",
+    "Attachment Patterns",
+    "Empathy & Responsiveness",
+    "Self-Insight",
+    "Trust & Boundaries",
+    "Stability & Consistency"
+]
+
+# Built once per process at import
+LIKERT_QUESTIONS = {
+    cat: [
+        f"On a scale of 1–5, how important is {cat.lower()} to you in relationships?",
+        f"How would you rate your current level in {cat.lower()}?",
+        f"How often do you reflect on {cat.lower()}?"
+    ]
+    for cat in CATEGORIES
+}
+
+ASSESSMENT_QUESTIONS = {
+    cat: [
+        f"How often do you recognize patterns in {cat.lower()}?",
+        f"How comfortable are you discussing {cat.lower()}?",
+        f"How does {cat.lower()} impact your connections?"
+    ]
+    for cat in CATEGORIES
+}
+
+# -----------------------------
+# Responses
+# Notes:
+# - One session's answers are a (categories, questions) int8 array in CATEGORIES order and
+#   question list order (24 bytes), not a dict keyed by question text.
+# - Question IDs are stable: category index * QUESTION_ID_STRIDE + position in its list.
+#   New questions go at the end of their category's list and new categories at the end
+#   of CATEGORIES, so an ID keeps its meaning as the catalogs grow.
+QUESTIONS_PER_CATEGORY = 3
+DEFAULT_ANSWER = 3  # the sliders' starting value
+RESPONSE_DTYPE = np.int8
+QUESTION_ID_STRIDE = 16
+
+def question_id(cat_i: int, q_i: int) -> int:
+    return cat_i * QUESTION_ID_STRIDE + q_i
+
+def question_position(qid: int) -> tuple:
+    """(category index, question index) of a question ID."""
+    return divmod(qid, QUESTION_ID_STRIDE)
+
+def question_text(questions: dict, qid: int) -> str:
+    cat_i, q_i = question_position(qid)
+    return questions[CATEGORIES[cat_i]][q_i]
+
+def new_responses() -> np.ndarray:
+    """Answers for one session, every question at DEFAULT_ANSWER."""
+    return np.full((len(CATEGORIES), QUESTIONS_PER_CATEGORY), DEFAULT_ANSWER, dtype=RESPONSE_DTYPE)
+
+# -----------------------------
+# Stability Smoothing (EMA + Dampening)
+# -----------------------------
+EMA_ALPHA = 0.25  # 0<alpha<=1; lower = smoother, higher = more responsive
+MAX_DAILY_CHANGE = 15.0  # max allowed change in score points per day (per category)
+MIN_CHANGE_FLOOR = 2.0   # minimum allowed change even if dt is very small (prevents "stuck" feeling)
+OUTLIER_SOFT_THRESHOLD = 25.0  # deltas above this get compressed ("dampened")
+
+def _now_ts() -> float:
+    return time.time()
+
+def _dt_days(prev_ts: float | None, now: float | None = None) -> float:
+    if not prev_ts:
+        return 1.0
+    if now is None:
+        now = _now_ts()
+    dt = max(0.0, now - float(prev_ts))
+    return max(dt / 86400.0, 1.0 / 1440.0)  # at least 1 minute
+
+def _dampen_delta(delta: float, threshold: float = OUTLIER_SOFT_THRESHOLD) -> float:
+    """Soft dampening: compress very large deltas without hard-clipping."""
+    ad = abs(delta)
+    if ad <= threshold:
+        return delta
+    # Beyond threshold, compress using a square-root curve (smooth, monotonic)
+    compressed = threshold + (ad - threshold) ** 0.5 * 5.0
+    return float(np.sign(delta) * compressed)
+
+def _cap_delta(delta: float, allowed: float) -> float:
+    if abs(delta) <= allowed:
+        return delta
+    return float(np.sign(delta) * allowed)
+
+def smooth_scores(new_scores: dict, prev_scores: dict | None, prev_ts: float | None,
+                  now: float | None = None) -> dict:
+    """Apply EMA smoothing + outlier dampening + max-delta cap to category scores (not including RGI).
+
+    `now` defaults to the current time; pass a submission timestamp to replay history.
+    """
+    if not prev_scores:
+        return new_scores
+
+    days = _dt_days(prev_ts, now)
+    allowed = max(MIN_CHANGE_FLOOR, MAX_DAILY_CHANGE * days)
+
+    smoothed = {}
+    for cat in CATEGORIES:
+        new_v = float(new_scores.get(cat, 0.0))
+        old_v = float(prev_scores.get(cat, new_v))
+
+        # 1) dampen outliers in the update step
+        raw_delta = new_v - old_v
+        damp_delta = _dampen_delta(raw_delta)
+
+        # 2) EMA on the dampened target
+        target = old_v + damp_delta
+        ema = old_v + EMA_ALPHA * (target - old_v)
+
+        # 3) cap maximum movement based on elapsed time
+        capped_delta = _cap_delta(ema - old_v, allowed)
+        smoothed[cat] = float(np.clip(old_v + capped_delta, 20, 90))
+
+    return smoothed
+
+def smooth_scores_batch(new, prev, prev_ts, now,
+                        alpha: float = EMA_ALPHA,
+                        max_daily_change: float = MAX_DAILY_CHANGE,
+                        min_change_floor: float = MIN_CHANGE_FLOOR,
+                        outlier_threshold: float = OUTLIER_SOFT_THRESHOLD) -> np.ndarray:
+    """smooth_scores() for N independent sessions at once.
+
+    new, prev: (N, categories) scores; NaN in `prev` means "no previous value"
+    (a row of NaN passes `new` through, like a missing snapshot).
+    prev_ts, now: (N,) timestamps; NaN or 0 in `prev_ts` counts as one day elapsed.
+    """
+    new = np.asarray(new, dtype=float)
+    prev = np.asarray(prev, dtype=float)
+    prev_ts = np.asarray(prev_ts, dtype=float)
+    now = np.asarray(now, dtype=float)
+
+    # elapsed-time allowance, same rules as _dt_days()
+    with np.errstate(invalid="ignore"):
+        days = np.maximum(np.maximum(0.0, now - prev_ts) / 86400.0, 1.0 / 1440.0)
+    days = np.where(np.isnan(prev_ts) | (prev_ts == 0), 1.0, days)
+    allowed = np.maximum(min_change_floor, max_daily_change * days)[..., None]
+
+    missing = np.isnan(prev)
+    old = np.where(missing, new, prev)
+
+    # 1) dampen outliers in the update step
+    raw_delta = new - old
+    ad = np.abs(raw_delta)
+    over = np.maximum(ad - outlier_threshold, 0.0)
+    damp_delta = np.where(ad <= outlier_threshold, raw_delta,
+                          np.sign(raw_delta) * (outlier_threshold + over ** 0.5 * 5.0))
+
+    # 2) EMA on the dampened target
+    target = old + damp_delta
+    ema = old + alpha * (target - old)
+
+    # 3) cap maximum movement based on elapsed time
+    step = ema - old
+    capped_delta = np.where(np.abs(step) <= allowed, step, np.sign(step) * allowed)
+    smoothed = np.clip(old + capped_delta, 20, 90)
+
+    return np.where(missing.all(axis=-1, keepdims=True), new, smoothed)
+
+def replay_smoothing(raw, ts,
+                     alpha: float = EMA_ALPHA,
+                     max_daily_change: float = MAX_DAILY_CHANGE,
+                     min_change_floor: float = MIN_CHANGE_FLOOR,
+                     outlier_threshold: float = OUTLIER_SOFT_THRESHOLD) -> np.ndarray:
+    """Replay smooth_scores() over whole submission histories, vectorized across users and categories.
+
+    raw: (users, timesteps, categories) raw category scores in submission order.
+    ts:  (users, timesteps) submission timestamps; NaN marks padding for shorter histories.
+    Returns the (users, timesteps, categories) smoothed scores (NaN where ts is NaN).
+    With the default parameters each step equals
+    smooth_scores(raw[u, t], smoothed[u, t-1], ts[u, t-1], now=ts[u, t]).
+    Pass different parameters to rebuild histories after a tuning change.
+    """
+    raw = np.asarray(raw, dtype=float)
+    ts = np.asarray(ts, dtype=float)
+    n_users, n_steps, n_cats = raw.shape
+
+    out = np.full(raw.shape, np.nan)
+    prev = np.full((n_users, n_cats), np.nan)
+    prev_ts = np.full(n_users, np.nan)
+
+    for t in range(n_steps):
+        now = ts[:, t]
+        present = ~np.isnan(now)
+        smoothed = smooth_scores_batch(raw[:, t, :], prev, prev_ts, now,
+                                       alpha, max_daily_change, min_change_floor, outlier_threshold)
+
+        # padding keeps the previous state
+        out[:, t, :] = np.where(present[:, None], smoothed, np.nan)
+        prev = np.where(present[:, None], smoothed, prev)
+        prev_ts = np.where(present, now, prev_ts)
+
+    return out
+
+# -----------------------------
+# Batch scoring (vectorized)
+# Notes:
+# - Answers are (N users x len(CATEGORIES) x 3 questions) arrays of 1-5 values,
+#   in CATEGORIES order and question order of LIKERT_QUESTIONS / ASSESSMENT_QUESTIONS.
+RGI_WEIGHTS = np.array([0.15, 0.15, 0.15, 0.10, 0.15, 0.10, 0.10, 0.10], dtype=float)
+
+def responses_to_array(responses, questions: dict) -> np.ndarray:
+    """One session's answers as a (1, categories, questions) float array.
+
+    `responses` is a new_responses() array or a dict keyed by question ID or question text.
+    """
+    if not isinstance(responses, dict):
+        return np.asarray(responses, dtype=float)[None]
+    out = np.empty((1, len(CATEGORIES), QUESTIONS_PER_CATEGORY))
+    for c, cat in enumerate(CATEGORIES):
+        for q, text in enumerate(questions[cat]):
+            qid = question_id(c, q)
+            out[0, c, q] = responses[qid] if qid in responses else responses[text]
+    return out
+
+def batch_category_scores(likert, assessment, mutual=None) -> np.ndarray:
+    """Raw category scores for a batch of sessions, shape (N, categories), clipped to 20-90.
+
+    `mutual` is an optional (N, categories) array of partner scores blended in at 60%;
+    NaN entries mean no partner input for that row.
+    """
+    likert = np.asarray(likert)
+    assessment = np.asarray(assessment)
+    # sum/count in float64 == np.mean of the per-session lists, without a float copy of the input
+    baseline = likert.sum(axis=-1, dtype=float) / likert.shape[-1] * 20.0
+    raw = assessment.sum(axis=-1, dtype=float) / assessment.shape[-1] * 20.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(baseline > 0, (raw / baseline) * 50.0, raw)
+
+    if mutual is not None:
+        mutual = np.asarray(mutual, dtype=float)
+        score = np.where(np.isnan(mutual), score, 0.4 * score + 0.6 * mutual)
+
+    return np.clip(score, 20, 90)
+
+def batch_rgi(category_scores) -> np.ndarray:
+    """RGI per row of an (N, categories) score matrix, clipped to 20-90."""
+    category_scores = np.asarray(category_scores, dtype=float)
+    return np.clip(np.sum(category_scores * RGI_WEIGHTS, axis=-1), 20, 90)
+
+def compute_scores_batch(likert, assessment, mutual=None):
+    """Score a whole population at once.
+
+    Returns (raw_scores, rgi) with shapes (N, categories) and (N,). For sessions
+    without a previous snapshot (no smoothing) these are exactly the numbers
+    score_session() returns as `raw` and `scores["RGI"]`.
+    """
+    raw = batch_category_scores(likert, assessment, mutual)
+    return raw, batch_rgi(raw)
+
+# -----------------------------
+# Live preview (incremental)
+# -----------------------------
+class RunningScores:
+    """Raw category scores and RGI kept up to date one answer at a time.
+
+    Holds per-category answer sums, so update() touches only the changed
+    category: O(1) instead of rescoring all categories. Numbers match
+    batch_category_scores() / batch_rgi() without mutual input or smoothing.
+    """
+
+    def __init__(self, likert, assessment):
+        likert = np.asarray(likert, dtype=float)
+        self.answers = np.array(assessment, dtype=float)      # (categories, questions)
+        self.n_questions = self.answers.shape[1]
+        self.baseline = likert.sum(axis=-1) / likert.shape[-1] * 20.0
+        self.sums = self.answers.sum(axis=-1)                 # running per-category sums
+        self.scores = np.array([self._category_score(c) for c in range(len(self.sums))])
+        self._weighted = float(np.sum(self.scores * RGI_WEIGHTS))  # running weighted sum for the RGI
+
+    def _category_score(self, c: int) -> float:
+        raw = self.sums[c] / self.n_questions * 20.0
+        score = raw / self.baseline[c] * 50.0 if self.baseline[c] > 0 else raw
+        return min(max(score, 20.0), 90.0)
+
+    def update(self, c: int, q: int, value) -> None:
+        """Record answer `value` for question q of category c."""
+        delta = float(value) - self.answers[c, q]
+        if not delta:
+            return
+        self.answers[c, q] = value
+        self.sums[c] += delta
+        new = self._category_score(c)
+        self._weighted += RGI_WEIGHTS[c] * (new - self.scores[c])
+        self.scores[c] = new
+
+    @property
+    def rgi(self) -> float:
+        return min(max(self._weighted, 20.0), 90.0)
+
+    def score_dict(self) -> dict:
+        return dict(zip(CATEGORIES, self.scores.tolist()))
+
+# -----------------------------
+# Single session
+# -----------------------------
+def score_session(likert, assessment, prev_scores: dict | None = None, prev_ts: float | None = None,
+                  now: float | None = None, mutual=None) -> dict:
+    """Score one submission.
+
+    likert / assessment: (categories, 3) answers in CATEGORIES order.
+    prev_scores / prev_ts: the user's last smoothed snapshot, if any.
+    mutual: optional (categories,) partner scores.
+    Returns {"ts", "raw", "smoothed", "scores"}; `scores` is `smoothed` plus "RGI".
+    """
+    now = _now_ts() if now is None else now
+
+    # --- Step 1: Compute "raw" category scores
+    mutual = None if mutual is None else np.asarray(mutual, dtype=float)[None]
+    raw = batch_category_scores(np.asarray(likert)[None], np.asarray(assessment)[None], mutual)[0]
+    raw_scores = {cat: float(v) for cat, v in zip(CATEGORIES, raw)}
+
+    # --- Step 2: Apply stability smoothing (EMA + dampening)
+    smoothed = dict(smooth_scores(raw_scores, prev_scores, prev_ts, now))
+
+    # --- Step 3: Compute RGI from the (smoothed) category scores
+    scores = dict(smoothed)
+    scores["RGI"] = float(batch_rgi([smoothed[c] for c in CATEGORIES]))
+
+    return {"ts": now, "raw": raw_scores, "smoothed": smoothed, "scores": scores}
@@ -0,0 +1,90 @@
+"""Fixed-capacity score history backed by a NumPy structured array.
+
+Each slot holds one submission: timestamp, raw and smoothed category scores
+(float32) and the RGI. Appends overwrite the oldest slot once full, so a
+session's history never grows past `capacity` rows.
+"""
+import numpy as np
+
+DEFAULT_CAPACITY = 20
+
+
+def history_dtype(n_categories: int) -> np.dtype:
+    return np.dtype([
+        ("ts", "f8"),
+        ("raw", "f4", (n_categories,)),
+        ("smoothed", "f4", (n_categories,)),
+        ("rgi", "f4"),
+    ])
+
+
+class ScoreHistory:
+    """Ring buffer of score snapshots; accessors return chronological (oldest first) arrays."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, n_categories: int = 8):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._buf = np.zeros(capacity, dtype=history_dtype(n_categories))
+        self._head = 0   # next slot to write
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    @property
+    def nbytes(self) -> int:
+        return self._buf.nbytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, ts: float, raw, smoothed, rgi: float) -> None:
+        """O(1): write into the next slot, overwriting the oldest entry when full."""
+        slot = self._buf[self._head]
+        slot["ts"] = ts
+        slot["raw"] = raw
+        slot["smoothed"] = smoothed
+        slot["rgi"] = rgi
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _order(self) -> np.ndarray:
+        return np.arange(self._head - self._count, self._head) % self.capacity
+
+    def records(self) -> np.ndarray:
+        """Chronological copy of the stored rows (structured array)."""
+        return self._buf[self._order()]
+
+    def latest(self):
+        """Most recent row, or None when empty."""
+        if not self._count:
+            return None
+        return self._buf[(self._head - 1) % self.capacity].copy()
+
+    # -- vectorized accessors for trend charts -------------------------------
+    def timestamps(self) -> np.ndarray:
+        return self._buf["ts"][self._order()]
+
+    def raw(self) -> np.ndarray:
+        """(entries, categories) raw scores."""
+        return self._buf["raw"][self._order()]
+
+    def smoothed(self) -> np.ndarray:
+        """(entries, categories) smoothed scores."""
+        return self._buf["smoothed"][self._order()]
+
+    def rgi(self) -> np.ndarray:
+        return self._buf["rgi"][self._order()]
+
+    def smoothing_deltas(self) -> np.ndarray:
+        """(entries, categories) smoothed minus raw."""
+        order = self._order()
+        return self._buf["smoothed"][order] - self._buf["raw"][order]
+
+    def resized(self, capacity: int) -> "ScoreHistory":
+        """Copy with a different window, keeping the newest entries that fit."""
+        out = ScoreHistory(capacity, self._buf["raw"].shape[1])
+        for row in self.records()[-capacity:]:
+            out.append(row["ts"], row["raw"], row["smoothed"], row["rgi"])
+        return out
@@ -0,0 +1,95 @@
+"""Table-driven insights: score bands, copy, and one shared Insight per (category, band).
+
+Classification is np.digitize over a whole (N, categories) score matrix, so the
+batch CLI can label millions of rows at once; turning band indices into
+insights is a lookup in INSIGHT_TABLE, which holds preloaded read-only records
+that every session shares instead of building new dicts per call.
+"""
+from bisect import bisect_right
+
+import numpy as np
+
+from relatescore.engine import CATEGORIES
+
+# Bands from low to high: (type, lowest score in the band). "Strength" starts just
+# above 70 because the rule is "> 70"; "Neutral" covers 40-70 inclusive.
+SCORE_BANDS = (
+    ("Blind Spot", -np.inf),
+    ("Neutral", 40.0),
+    ("Strength", float(np.nextafter(70.0, np.inf))),
+)
+BAND_TYPES = tuple(name for name, _ in SCORE_BANDS)
+BAND_EDGES = np.array([low for _, low in SCORE_BANDS[1:]])
+# NaN fails both "> 70" and "< 40", so the old if/elif chain called it Neutral
+NAN_SCORE = dict(SCORE_BANDS)["Neutral"]
+
+DEFAULT_SUGGESTION = "Consider a small experiment this week to shift this pattern by 1%."
+BAND_COPY = {
+    "Strength": ("This is a strong foundation to build on.", DEFAULT_SUGGESTION),
+    "Blind Spot": ("This pattern may create misunderstandings.", DEFAULT_SUGGESTION),
+    "Neutral": ("Balanced area with room for awareness.", DEFAULT_SUGGESTION),
+}
+# Per-category wording, overriding BAND_COPY: {category: {band type: (description, suggestion)}}
+CATEGORY_COPY = {}
+
+
+class Insight(dict):
+    """Read-only insight record ({"category", "type", "description", "suggestion"}).
+
+    A dict so templates and json.dumps keep working; instances are shared, so
+    mutation is refused.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Insight records are shared and read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        # rebuild from a plain dict: pickle/copy would otherwise refill it through __setitem__
+        return (Insight, (dict(self),))
+
+
+def build_table(categories=CATEGORIES) -> np.ndarray:
+    """(categories, bands) object array of Insight records, built once."""
+    table = np.empty((len(categories), len(BAND_TYPES)), dtype=object)
+    for c, cat in enumerate(categories):
+        for b, band in enumerate(BAND_TYPES):
+            desc, suggestion = CATEGORY_COPY.get(cat, {}).get(band, BAND_COPY[band])
+            table[c, b] = Insight(category=cat, type=band, description=desc, suggestion=suggestion)
+    return table
+
+
+INSIGHT_TABLE = build_table()
+_CATEGORY_INDEX = np.arange(len(CATEGORIES))
+_EDGES = BAND_EDGES.tolist()
+_ROWS = [(cat, INSIGHT_TABLE[c].tolist()) for c, cat in enumerate(CATEGORIES)]
+
+
+def classify(scores) -> np.ndarray:
+    """Band index per score for an (..., categories) array; NaN scores are Neutral."""
+    scores = np.nan_to_num(np.asarray(scores, dtype=float), nan=NAN_SCORE)
+    return np.digitize(scores, BAND_EDGES).astype(np.int8)
+
+
+def batch_insights(scores) -> np.ndarray:
+    """(N, categories) object array of shared Insight records for an (N, categories) score matrix."""
+    return INSIGHT_TABLE[_CATEGORY_INDEX, classify(scores)]
+
+
+def generate_insights(scores: dict) -> list:
+    """Insights for one {category: score} dict, in CATEGORIES order.
+
+    Missing scores count as 0, NaN scores are Neutral.
+
+    Same bands as classify(); bisect_right over the edges is np.digitize for one
+    value, without array overhead on the per-session path.
+    """
+    out = []
+    for cat, row in _ROWS:
+        score = scores.get(cat, 0)
+        out.append(row[bisect_right(_EDGES, score if score == score else NAN_SCORE)])
+    return out
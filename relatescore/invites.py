@@ -0,0 +1,382 @@
+"""Thread-safe invite code store shared by all sessions of one process.
+
+Codes are spread over `stripes` shards by hash; each shard has its own lock,
+dict and min-heap expiry index, so sessions touching different codes rarely
+wait on each other. Every operation on a code runs under its shard's lock,
+and validate_and_consume() checks and redeems a code in one step so two
+partners cannot both redeem it.
+
+SQLiteInviteStore has the same interface and semantics but keeps codes in a
+local SQLite file, so every worker process on the host shares one registry.
+"""
+import heapq
+import threading
+import time
+
+from relatescore.storage import ConnectionPool
+
+INVITE_TTL_SECONDS = 60 * 30  # 30 minutes
+DEFAULT_STRIPES = 16
+
+
+class _Shard:
+    __slots__ = ("lock", "invites", "expiry", "subscribers", "registered", "consumed", "expired")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.invites = {}      # { CODE: {"created_at": ts, "used": bool} }
+        self.expiry = []       # heap of (expires_at, CODE); may hold stale entries for re-registered codes
+        self.subscribers = {}  # { CODE: {key: callback} }, fired once when CODE is consumed
+        self.registered = 0
+        self.consumed = 0
+        self.expired = 0
+
+
+class InviteStore:
+    """Invite codes with TTL expiry, one-time redemption and consume notifications.
+
+    Lookups, registration and consumption are O(1) dict operations under one shard
+    lock; expiry cleanup only pops heap entries that are actually due (amortized
+    O(expired)). Callbacks run after the shard lock is released.
+    """
+
+    def __init__(self, ttl_seconds: float = INVITE_TTL_SECONDS, stripes: int = DEFAULT_STRIPES):
+        if stripes < 1 or stripes & (stripes - 1):
+            raise ValueError("stripes must be a power of two")
+        self.ttl_seconds = ttl_seconds
+        self._shards = [_Shard() for _ in range(stripes)]
+        self._mask = stripes - 1
+
+    def _shard(self, code: str) -> _Shard:
+        return self._shards[hash(code) & self._mask]
+
+    def __len__(self) -> int:
+        return sum(len(s.invites) for s in self._shards)
+
+    def get(self, code: str):
+        shard = self._shard(code)
+        with shard.lock:
+            meta = shard.invites.get(code)
+            return dict(meta) if meta else None
+
+    # -- called with shard.lock held -------------------------------------------
+    def _purge_shard(self, shard: _Shard, now: float) -> int:
+        removed = 0
+        while shard.expiry and shard.expiry[0][0] < now:
+            expires_at, code = heapq.heappop(shard.expiry)
+            meta = shard.invites.get(code)
+            # Skip stale heap entries left behind when a code was registered again
+            if meta is not None and meta["created_at"] + self.ttl_seconds == expires_at:
+                del shard.invites[code]
+                shard.subscribers.pop(code, None)
+                removed += 1
+        shard.expired += removed
+        return removed
+
+    def _check(self, shard: _Shard, code: str, now: float):
+        meta = shard.invites.get(code)
+        if not meta:
+            return False, "missing"
+        if (now - meta["created_at"]) > self.ttl_seconds:
+            shard.invites.pop(code, None)
+            shard.subscribers.pop(code, None)
+            shard.expired += 1
+            return False, "expired"
+        if meta["used"]:
+            return False, "used"
+        return True, "ok"
+
+    def _mark_used(self, shard: _Shard, code: str) -> dict:
+        shard.invites[code]["used"] = True
+        shard.consumed += 1
+        return shard.subscribers.pop(code, {})
+
+    # -- public API --------------------------------------------------------------
+    def purge_expired(self, now: float | None = None) -> int:
+        """Drop every code whose TTL has elapsed, shard by shard. Returns how many were removed."""
+        if now is None:
+            now = time.time()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += self._purge_shard(shard, now)
+        return removed
+
+    def register(self, code: str, now: float | None = None) -> None:
+        if now is None:
+            now = time.time()
+        shard = self._shard(code)
+        with shard.lock:
+            self._purge_shard(shard, now)
+            shard.invites[code] = {"created_at": now, "used": False}
+            heapq.heappush(shard.expiry, (now + self.ttl_seconds, code))
+            shard.registered += 1
+
+    def validate(self, code: str, now: float | None = None):
+        """(is_valid, reason) without redeeming; reasons: ok | missing | expired | used."""
+        if now is None:
+            now = time.time()
+        shard = self._shard(code)
+        with shard.lock:
+            result = self._check(shard, code, now)  # before the sweep, so a lapsed code reports "expired"
+            self._purge_shard(shard, now)
+            return result
+
+    def validate_and_consume(self, code: str, now: float | None = None):
+        """Atomically redeem `code`: (True, "ok") for exactly one caller, else (False, reason)."""
+        if now is None:
+            now = time.time()
+        shard = self._shard(code)
+        with shard.lock:
+            result = self._check(shard, code, now)
+            callbacks = self._mark_used(shard, code) if result[0] else {}
+            self._purge_shard(shard, now)
+        for callback in callbacks.values():
+            callback(code)
+        return result
+
+    def consume(self, code: str) -> None:
+        shard = self._shard(code)
+        with shard.lock:
+            meta = shard.invites.get(code)
+            callbacks = self._mark_used(shard, code) if meta and not meta["used"] else {}
+        for callback in callbacks.values():
+            callback(code)
+
+    def subscribe(self, code: str, key, callback, now: float | None = None) -> None:
+        """Call `callback(code)` once when `code` is consumed (right away if it already was).
+
+        Subscribing again with the same `key` replaces the earlier callback. A missing or
+        expired code can never be consumed, so nothing is registered for it.
+        """
+        if now is None:
+            now = time.time()
+        shard = self._shard(code)
+        with shard.lock:
+            _, reason = self._check(shard, code, now)
+            if reason == "ok":
+                shard.subscribers.setdefault(code, {})[key] = callback
+        if reason == "used":
+            callback(code)
+
+    def stats(self) -> dict:
+        """Size and lifetime counters, for sizing and monitoring."""
+        out = {"size": 0, "index_size": 0, "registered": 0, "consumed": 0, "expired": 0, "waiting_codes": 0}
+        for shard in self._shards:
+            with shard.lock:
+                out["size"] += len(shard.invites)
+                out["index_size"] += len(shard.expiry)
+                out["registered"] += shard.registered
+                out["consumed"] += shard.consumed
+                out["expired"] += shard.expired
+                out["waiting_codes"] += len(shard.subscribers)
+        out["stripes"] = len(self._shards)
+        return out
+
+
+# -----------------------------
+# Cross-process registry (SQLite)
+# -----------------------------
+INVITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS invites (
+    code       TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    used       INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS invites_expires_at ON invites (expires_at);
+CREATE TABLE IF NOT EXISTS invite_counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO invite_counters (name, value) VALUES ('registered', 0), ('consumed', 0), ('expired', 0);
+"""
+WATCH_INTERVAL_SECONDS = 0.25
+
+
+class SQLiteInviteStore:
+    """InviteStore shared by all processes that open the same SQLite file.
+
+    Redemption is a single conditional UPDATE, so exactly one session on any
+    worker wins a code. Subscriptions are per process: a watcher thread (started
+    on first subscribe) checks PRAGMA data_version every WATCH_INTERVAL_SECONDS
+    and, when another connection has committed, calls back local subscribers
+    whose codes were consumed elsewhere.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = INVITE_TTL_SECONDS, pool_size: int = 8,
+                 watch_interval: float = WATCH_INTERVAL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.watch_interval = watch_interval
+        self.pool = ConnectionPool(path, size=pool_size)
+        with self.pool.connection() as conn, conn:
+            conn.executescript(INVITE_SCHEMA)
+        self._subscribers = {}  # { CODE: {key: callback} }, this process only
+        self._sub_lock = threading.Lock()
+        self._watcher = None
+        self._closed = threading.Event()
+
+    # -- called inside a transaction -------------------------------------------
+    @staticmethod
+    def _bump(conn, name: str, n: int = 1) -> None:
+        if n:
+            conn.execute("UPDATE invite_counters SET value = value + ? WHERE name = ?", (n, name))
+
+    def _purge(self, conn, now: float) -> int:
+        with self._sub_lock:
+            waiting = bool(self._subscribers)
+        if waiting:  # only look the codes up when a local subscriber may be waiting on one
+            self._unsubscribe_all(
+                code for (code,) in conn.execute("SELECT code FROM invites WHERE expires_at < ?", (now,))
+            )
+        removed = conn.execute("DELETE FROM invites WHERE expires_at < ?", (now,)).rowcount
+        self._bump(conn, "expired", removed)
+        return removed
+
+    def _check(self, conn, code: str, now: float):
+        row = conn.execute("SELECT created_at, used FROM invites WHERE code = ?", (code,)).fetchone()
+        if row is None:
+            return False, "missing"
+        created_at, used = row
+        if (now - created_at) > self.ttl_seconds:
+            conn.execute("DELETE FROM invites WHERE code = ?", (code,))
+            self._bump(conn, "expired")
+            self._unsubscribe_all((code,))
+            return False, "expired"
+        if used:
+            return False, "used"
+        return True, "ok"
+
+    def _unsubscribe_all(self, codes) -> None:
+        with self._sub_lock:
+            for code in codes:
+                self._subscribers.pop(code, None)
+
+    def _fire(self, code: str) -> None:
+        with self._sub_lock:
+            callbacks = self._subscribers.pop(code, {})
+        for callback in callbacks.values():
+            callback(code)
+
+    # -- public API (same as InviteStore) --------------------------------------
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM invites").fetchone()[0]
+
+    def get(self, code: str):
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT created_at, used FROM invites WHERE code = ?", (code,)).fetchone()
+        return {"created_at": row[0], "used": bool(row[1])} if row else None
+
+    def purge_expired(self, now: float | None = None) -> int:
+        """Drop every code whose TTL has elapsed. Returns how many were removed."""
+        if now is None:
+            now = time.time()
+        with self.pool.connection() as conn, conn:
+            return self._purge(conn, now)
+
+    def register(self, code: str, now: float | None = None) -> None:
+        if now is None:
+            now = time.time()
+        with self.pool.connection() as conn, conn:
+            self._purge(conn, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO invites (code, created_at, expires_at, used) VALUES (?, ?, ?, 0)",
+                (code, now, now + self.ttl_seconds),
+            )
+            self._bump(conn, "registered")
+
+    def validate(self, code: str, now: float | None = None):
+        """(is_valid, reason) without redeeming; reasons: ok | missing | expired | used."""
+        if now is None:
+            now = time.time()
+        with self.pool.connection() as conn, conn:
+            return self._check(conn, code, now)
+
+    def validate_and_consume(self, code: str, now: float | None = None):
+        """Atomically redeem `code`: (True, "ok") for exactly one caller across processes."""
+        if now is None:
+            now = time.time()
+        with self.pool.connection() as conn, conn:
+            won = conn.execute(
+                "UPDATE invites SET used = 1 WHERE code = ? AND used = 0 AND ? - created_at <= ?",
+                (code, now, self.ttl_seconds),
+            ).rowcount == 1
+            if won:
+                self._bump(conn, "consumed")
+                result = True, "ok"
+            else:
+                result = self._check(conn, code, now)
+        if won:
+            self._fire(code)
+        return result
+
+    def consume(self, code: str) -> None:
+        with self.pool.connection() as conn, conn:
+            won = conn.execute("UPDATE invites SET used = 1 WHERE code = ? AND used = 0", (code,)).rowcount == 1
+            if won:
+                self._bump(conn, "consumed")
+        if won:
+            self._fire(code)
+
+    def subscribe(self, code: str, key, callback, now: float | None = None) -> None:
+        """Call `callback(code)` once when `code` is consumed by any process (right away if it already was).
+
+        Subscribing again with the same `key` replaces the earlier callback. A missing or
+        expired code can never be consumed, so nothing is registered for it.
+        """
+        _, reason = self.validate(code, now)
+        if reason == "used":
+            callback(code)
+            return
+        if reason != "ok":
+            return
+        with self._sub_lock:
+            self._subscribers.setdefault(code, {})[key] = callback
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="invite-watcher", daemon=True)
+                self._watcher.start()
+
+    def _watch(self) -> None:
+        conn = self.pool._connect()  # own connection: data_version only moves for other connections' commits
+        last_version = None
+        try:
+            while not self._closed.wait(self.watch_interval):
+                with self._sub_lock:
+                    codes = list(self._subscribers)
+                if not codes:
+                    continue
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if version == last_version:
+                    continue
+                last_version = version
+                present = set()
+                for i in range(0, len(codes), 500):
+                    chunk = codes[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT code, used FROM invites WHERE code IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    for code, used in rows:
+                        present.add(code)
+                        if used:
+                            self._fire(code)
+                with self._sub_lock:
+                    for code in set(codes) - present:  # expired or purged: nothing left to wait for
+                        self._subscribers.pop(code, None)
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        """Size and lifetime counters (shared by all processes), for sizing and monitoring."""
+        with self.pool.connection() as conn:
+            out = dict(conn.execute("SELECT name, value FROM invite_counters").fetchall())
+            out["size"] = out["index_size"] = conn.execute("SELECT COUNT(*) FROM invites").fetchone()[0]
+        with self._sub_lock:
+            out["waiting_codes"] = len(self._subscribers)
+        return out
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        self.pool.close()
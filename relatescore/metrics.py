@@ -0,0 +1,319 @@
+"""Optional process-wide timing metrics with Prometheus text export.
+
+Off unless one of these is set (read once, at import):
+
+    RELATESCORE_METRICS=1                 record in memory only (e.g. for benchmarks)
+    RELATESCORE_METRICS_FILE=/path.prom   also rewrite /path-<pid>.prom every RELATESCORE_METRICS_INTERVAL s (15)
+    RELATESCORE_METRICS_PORT=9464         also serve http://127.0.0.1:PORT/metrics
+
+Every worker process exports its own numbers. With several workers each one
+writes its own file, whose samples carry a pid label so node_exporter's
+textfile collector can read them all side by side. Each worker also serves on
+the first free port of PORT .. PORT + RELATESCORE_METRICS_PORT_SPAN - 1 (16).
+A worker that cannot bind any of them logs a warning and keeps running
+without the endpoint.
+
+When off, timed() returns the function it decorates unchanged, so instrumented
+code runs exactly as before. Histogram counts double as call counts
+(<name>_count in the export).
+"""
+import atexit
+import bisect
+import errno
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_FILE = os.environ.get("RELATESCORE_METRICS_FILE") or None
+METRICS_PORT = int(os.environ.get("RELATESCORE_METRICS_PORT", 0)) or None
+METRICS_PORT_SPAN = max(1, int(os.environ.get("RELATESCORE_METRICS_PORT_SPAN", 16)))
+METRICS_INTERVAL = float(os.environ.get("RELATESCORE_METRICS_INTERVAL", 15))
+ENABLED = bool(os.environ.get("RELATESCORE_METRICS") not in (None, "", "0") or METRICS_FILE or METRICS_PORT)
+
+log = logging.getLogger(__name__)
+
+# seconds; page reruns range from ~1 ms (entry) to seconds (uncached wheel, password hashing)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _HistogramChild:
+    """One label set: per-bucket counts (cumulated at export), sum and count."""
+
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._children = {}  # {label values tuple: _HistogramChild}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels) -> _HistogramChild:
+        key = tuple(str(labels[n]) for n in self.label_names)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _HistogramChild(self.buckets))
+        return child
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            counts, total = child.snapshot()
+            base = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+            labels = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackCounter:
+    """Counters kept by another component, read at export time.
+
+    collect() returns {label values tuple: count}, e.g. from a stats() dict, so
+    the component pays nothing extra per event.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, collect):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.collect = collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.collect().items()):
+            labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key))
+            lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+        return lines
+
+
+class CallbackSummary:
+    """Quantile summaries kept by another component, read at export time.
+
+    collect() returns {label values tuple: (count, sum, {quantile: value})}.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, collect):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.collect = collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} summary"]
+        for key, (count, total, quantiles) in sorted(self.collect().items()):
+            base = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key))
+            sep = "," if base else ""
+            for q, value in quantiles.items():
+                lines.append(f'{self.name}{{{base}{sep}quantile="{q:g}"}} {value}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, label_names=(), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram; the same name always returns the same object."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, help_text, label_names, buckets)
+            return metric
+
+    def callback_counter(self, name: str, help_text: str, label_names, collect) -> CallbackCounter:
+        """Register counters read from collect() at export; registering a name again replaces collect."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = CallbackCounter(name, help_text, label_names, collect)
+            metric.collect = collect
+            return metric
+
+    def callback_summary(self, name: str, help_text: str, label_names, collect) -> CallbackSummary:
+        """Register quantile summaries read from collect() at export; registering a name again replaces collect."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = CallbackSummary(name, help_text, label_names, collect)
+            metric.collect = collect
+            return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+
+REGISTRY = Registry()
+PAGE_SECONDS = REGISTRY.histogram("relatescore_page_seconds", "Page function run time per rerun.", ("page",))
+CALL_SECONDS = REGISTRY.histogram("relatescore_call_seconds", "Run time of instrumented hot functions.",
+                                  ("function",))
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator recording each call's wall time in `histogram` under `labels`.
+
+    Exceptions (including Streamlit's rerun/stop signals) are timed too. With
+    metrics disabled the function is returned as is.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        child = histogram.labels(**labels)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - t0)
+        return wrapper
+    return decorate
+
+
+# -----------------------------
+# Export
+# -----------------------------
+def process_file_path(path: str, pid: int | None = None) -> str:
+    """`path` with this process's pid before the extension: metrics.prom -> metrics-<pid>.prom."""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{os.getpid() if pid is None else pid}{ext}"
+
+
+def add_label(text: str, name: str, value) -> str:
+    """Prometheus text with label name="value" added to every sample line."""
+    label = f'{name}="{_escape(value)}"'
+    lines = []
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            cut = min(i for i in (line.find("{"), line.find(" ")) if i >= 0)
+            if line[cut] == "{":
+                line = f"{line[:cut + 1]}{label},{line[cut + 1:]}"
+            else:
+                line = f"{line[:cut]}{{{label}}}{line[cut:]}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path: str, registry: Registry = REGISTRY, pid_label: bool = False) -> None:
+    """Atomically replace `path` with the current export (safe for node_exporter's textfile collector)."""
+    text = registry.render()
+    if pid_label:
+        text = add_label(text, "pid", os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _file_writer(path: str, interval: float, registry: Registry) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            write_file(path, registry, pid_label=True)
+        except OSError as exc:  # keep exporting once the directory is writable again
+            log.warning("could not write metrics file %s: %s", path, exc)
+
+
+def serve(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve GET /metrics on a daemon thread. Returns the server (call .shutdown() to stop)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def serve_first_free(port: int, span: int = METRICS_PORT_SPAN, registry: Registry = REGISTRY):
+    """serve() on the first port of port .. port + span - 1 that is free; None (logged) if none is."""
+    for candidate in range(port, port + span):
+        try:
+            return serve(candidate, registry=registry)
+        except OSError as exc:
+            if exc.errno != errno.EADDRINUSE:
+                log.warning("metrics endpoint disabled: cannot bind port %d: %s", candidate, exc)
+                return None
+    log.warning("metrics endpoint disabled: ports %d-%d are all in use", port, port + span - 1)
+    return None
+
+
+def start_exporters(registry: Registry = REGISTRY) -> dict:
+    """Start the exporters configured by the environment; call once per process.
+
+    Never raises for a busy port or an unwritable file: metrics are optional,
+    the app keeps running without them.
+    """
+    started = {}
+    if METRICS_FILE:
+        path = process_file_path(METRICS_FILE)
+        atexit.register(_remove_file, path)  # a stopped worker's numbers should not be scraped forever
+        threading.Thread(target=_file_writer, args=(path, METRICS_INTERVAL, registry),
+                         name="metrics-file", daemon=True).start()
+        started["file"] = path
+    if METRICS_PORT:
+        server = serve_first_free(METRICS_PORT, registry=registry)
+        if server is not None:
+            started["http"] = server
+    return started
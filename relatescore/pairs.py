@@ -0,0 +1,392 @@
+"""Partner pairs created by redeemed invites, with an incrementally updated mutual score.
+
+A pair is keyed by its invite code: side "a" created the invite, side "b"
+redeemed it. Each side's latest raw category scores are cached on the pair
+together with their RGI-weighted sum, so a submission from either side
+updates the pair from the new vector and the partner's cached aggregate,
+O(categories), without reading either partner's score history.
+
+The pair's category scores are the mean of both partners' scores and the
+mutual RGI is batch_rgi() of that mean, which is half the sum of the two
+cached weighted sums. Both stay None until both sides have submitted.
+
+Pairs are only reachable through the two sessions' state, so a pair that has
+not been updated (created, submitted to or withdrawn from) for ttl_seconds
+(RELATESCORE_PAIR_TTL, 7 days) is dropped, together with its subscribers.
+Like the invite store, the in-memory store keeps an expiry min-heap with one
+entry per pair and only pops entries that are due; an entry whose pair was
+updated since is pushed back with the new deadline.
+
+SQLitePairStore keeps the same records in a local SQLite file (the invite
+database), so partners served by different worker processes share one pair.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from relatescore.engine import CATEGORIES, RGI_WEIGHTS
+from relatescore.storage import ConnectionPool
+
+SIDES = ("a", "b")
+PAIR_TTL_SECONDS = float(os.environ.get("RELATESCORE_PAIR_TTL", 7 * 86400))
+
+
+def other_side(side: str) -> str:
+    if side not in SIDES:
+        raise ValueError(f"side must be one of {SIDES}")
+    return "b" if side == "a" else "a"
+
+
+def weighted_sum(scores) -> float:
+    """RGI-weighted sum of one (categories,) score vector, before clipping."""
+    return float(np.dot(np.asarray(scores, dtype=float), RGI_WEIGHTS))
+
+
+def mutual_rgi(weighted_a: float, weighted_b: float) -> float:
+    """batch_rgi() of the two partners' mean scores, from their cached weighted sums."""
+    return min(max((weighted_a + weighted_b) / 2.0, 20.0), 90.0)
+
+
+def _snapshot(code: str, version: int, updated_at: float, scores: list, rgi) -> dict:
+    both = scores[0] is not None and scores[1] is not None
+    pair_scores = dict(zip(CATEGORIES, ((scores[0] + scores[1]) / 2.0).tolist())) if both else None
+    return {
+        "code": code,
+        "version": version,
+        "updated_at": updated_at,
+        "submitted": {side: s is not None for side, s in zip(SIDES, scores)},
+        "scores": pair_scores,
+        "rgi": rgi,
+    }
+
+
+class _Pair:
+    __slots__ = ("created_at", "updated_at", "version", "scores", "weighted", "rgi", "subscribers", "due")
+
+    def __init__(self, now: float):
+        self.created_at = self.updated_at = now
+        self.due = None               # deadline of this pair's entry in the expiry heap
+        self.version = 0
+        self.scores = [None, None]    # latest (categories,) raw scores per side
+        self.weighted = [None, None]  # their RGI-weighted sums
+        self.rgi = None
+        self.subscribers = {}         # {key: callback}, called on every update
+
+
+class PairStore:
+    """In-memory pairs shared by all sessions of one process.
+
+    One lock guards the dict; every operation is O(1) or O(categories), plus
+    amortized O(log n) expiry, so sessions hold it only briefly. Callbacks run
+    after the lock is released.
+    """
+
+    def __init__(self, ttl_seconds: float = PAIR_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._pairs = {}   # { CODE: _Pair }
+        self._expiry = []  # heap of (due, CODE); entries of dropped pairs are skipped when popped
+        self.created = 0
+        self.submissions = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pairs)
+
+    # -- called with self._lock held -------------------------------------------
+    def _schedule(self, code: str, pair: _Pair) -> None:
+        pair.due = pair.updated_at + self.ttl_seconds
+        heapq.heappush(self._expiry, (pair.due, code))
+
+    def _purge(self, now: float) -> int:
+        removed = 0
+        while self._expiry and self._expiry[0][0] < now:
+            due, code = heapq.heappop(self._expiry)
+            pair = self._pairs.get(code)
+            if pair is None or pair.due != due:
+                continue  # dropped, or re-created with its own entry
+            if pair.updated_at + self.ttl_seconds < now:
+                del self._pairs[code]
+                removed += 1
+            else:
+                self._schedule(code, pair)  # updated since this entry was pushed
+        self.expired += removed
+        return removed
+
+    # -- public API --------------------------------------------------------------
+    def purge_expired(self, now: float | None = None) -> int:
+        """Drop every pair not updated for ttl_seconds. Returns how many were removed."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            return self._purge(now)
+
+    def create(self, code: str, now: float | None = None) -> bool:
+        """Create the pair for a redeemed invite. Returns False if it already exists."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._purge(now)
+            if code in self._pairs:
+                return False
+            pair = self._pairs[code] = _Pair(now)
+            self._schedule(code, pair)
+            self.created += 1
+            return True
+
+    def get(self, code: str):
+        """{"code", "version", "updated_at", "submitted", "scores", "rgi"} or None."""
+        with self._lock:
+            pair = self._pairs.get(code)
+            if pair is None:
+                return None
+            return _snapshot(code, pair.version, pair.updated_at, list(pair.scores), pair.rgi)
+
+    def version(self, code: str) -> int:
+        """Update counter of the pair (-1 if there is none): a cheap "anything new?" check."""
+        with self._lock:
+            pair = self._pairs.get(code)
+            return -1 if pair is None else pair.version
+
+    def partner_scores(self, code: str, side: str):
+        """The other side's latest raw category scores as a (categories,) array, or None."""
+        i = SIDES.index(other_side(side))
+        with self._lock:
+            pair = self._pairs.get(code)
+            scores = None if pair is None else pair.scores[i]
+        return None if scores is None else scores.copy()
+
+    def _set_side(self, code: str, side: str, scores, now: float | None):
+        i = SIDES.index(side)
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._purge(now)
+            pair = self._pairs.get(code)
+            if pair is None:
+                return None, {}
+            pair.scores[i] = scores
+            pair.weighted[i] = None if scores is None else weighted_sum(scores)
+            partner = pair.weighted[1 - i]
+            pair.rgi = None if pair.weighted[i] is None or partner is None else mutual_rgi(pair.weighted[i], partner)
+            pair.version += 1
+            pair.updated_at = now
+            if scores is not None:
+                self.submissions += 1
+            snap = _snapshot(code, pair.version, now, list(pair.scores), pair.rgi)
+            if scores is None and not any(snap["submitted"].values()):
+                del self._pairs[code]
+            return snap, dict(pair.subscribers)
+
+    def submit(self, code: str, side: str, scores, now: float | None = None):
+        """Record one side's latest raw category scores and update the pair score.
+
+        Returns the updated snapshot, or None if the pair does not exist.
+        """
+        other_side(side)
+        scores = np.array(scores, dtype=float)
+        snap, callbacks = self._set_side(code, side, scores, now)
+        for callback in callbacks.values():
+            callback(code)
+        return snap
+
+    def withdraw(self, code: str, side: str) -> None:
+        """Forget one side's scores (the pair score goes back to None); the pair is
+        dropped once neither side has scores left."""
+        other_side(side)
+        _, callbacks = self._set_side(code, side, None, None)
+        for callback in callbacks.values():
+            callback(code)
+
+    def subscribe(self, code: str, key, callback) -> None:
+        """Call `callback(code)` after every later update of the pair.
+
+        Subscribing again with the same `key` replaces the earlier callback.
+        """
+        with self._lock:
+            pair = self._pairs.get(code)
+            if pair is not None:
+                pair.subscribers[key] = callback
+
+    def unsubscribe(self, code: str, key) -> None:
+        """Remove the callback subscribed under `key`, if any."""
+        with self._lock:
+            pair = self._pairs.get(code)
+            if pair is not None:
+                pair.subscribers.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            complete = sum(1 for p in self._pairs.values() if p.rgi is not None)
+            return {"size": len(self._pairs), "complete": complete, "created": self.created,
+                    "submissions": self.submissions, "expired": self.expired}
+
+
+# -----------------------------
+# Cross-process pairs (SQLite)
+# -----------------------------
+PAIR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairs (
+    code       TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    version    INTEGER NOT NULL DEFAULT 0,
+    a_scores   TEXT,  -- JSON [score per category], NULL until side a submits
+    a_weighted REAL,
+    b_scores   TEXT,
+    b_weighted REAL,
+    rgi        REAL   -- mutual RGI, NULL until both sides submitted
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pairs_updated_at ON pairs (updated_at);
+"""
+
+
+class SQLitePairStore:
+    """PairStore shared by all processes that open the same SQLite file.
+
+    submit() is one UPDATE that stores the side's scores and recomputes the
+    mutual RGI from the partner's stored weighted sum, so two partners
+    submitting at once on different workers cannot both miss each other.
+    Subscriptions are per process: they fire for updates made by this
+    process; other processes' updates show up through version().
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = PAIR_TTL_SECONDS, pool_size: int = 8):
+        self.ttl_seconds = ttl_seconds
+        self.pool = ConnectionPool(path, size=pool_size)
+        with self.pool.connection() as conn, conn:
+            conn.executescript(PAIR_SCHEMA)
+        self._subscribers = {}  # { CODE: {key: callback} }, this process only
+        self._sub_lock = threading.Lock()
+
+    def _fire(self, code: str) -> None:
+        with self._sub_lock:
+            callbacks = dict(self._subscribers.get(code, {}))
+        for callback in callbacks.values():
+            callback(code)
+
+    @staticmethod
+    def _row_snapshot(code: str, row) -> dict:
+        version, updated_at, a_scores, b_scores, rgi = row
+        scores = [None if s is None else np.array(json.loads(s)) for s in (a_scores, b_scores)]
+        return _snapshot(code, version, updated_at, scores, rgi)
+
+    def _purge(self, conn, now: float) -> int:
+        expired = [code for (code,) in conn.execute(
+            "SELECT code FROM pairs WHERE updated_at < ?", (now - self.ttl_seconds,))]
+        if expired:
+            conn.executemany("DELETE FROM pairs WHERE code = ?", [(code,) for code in expired])
+            with self._sub_lock:
+                for code in expired:
+                    self._subscribers.pop(code, None)
+        return len(expired)
+
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+
+    def purge_expired(self, now: float | None = None) -> int:
+        """Drop every pair not updated for ttl_seconds. Returns how many were removed."""
+        if now is None:
+            now = time.time()
+        with self.pool.connection() as conn, conn:
+            return self._purge(conn, now)
+
+    def create(self, code: str, now: float | None = None) -> bool:
+        """Create the pair for a redeemed invite. Returns False if it already exists."""
+        if now is None:
+            now = time.time()
+        with self.pool.connection() as conn, conn:
+            self._purge(conn, now)
+            return conn.execute(
+                "INSERT OR IGNORE INTO pairs (code, created_at, updated_at) VALUES (?, ?, ?)", (code, now, now)
+            ).rowcount == 1
+
+    def get(self, code: str):
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT version, updated_at, a_scores, b_scores, rgi FROM pairs WHERE code = ?", (code,)
+            ).fetchone()
+        return None if row is None else self._row_snapshot(code, row)
+
+    def version(self, code: str) -> int:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT version FROM pairs WHERE code = ?", (code,)).fetchone()
+        return -1 if row is None else row[0]
+
+    def partner_scores(self, code: str, side: str):
+        with self.pool.connection() as conn:
+            row = conn.execute(f"SELECT {other_side(side)}_scores FROM pairs WHERE code = ?", (code,)).fetchone()
+        return None if row is None or row[0] is None else np.array(json.loads(row[0]))
+
+    def _set_side(self, code: str, side: str, scores, now: float | None):
+        other = other_side(side)
+        if now is None:
+            now = time.time()
+        weighted = None if scores is None else weighted_sum(scores)
+        with self.pool.connection() as conn, conn:
+            updated = conn.execute(
+                f"UPDATE pairs SET {side}_scores = ?, {side}_weighted = ?, version = version + 1, updated_at = ?, "
+                f"rgi = CASE WHEN ? IS NULL OR {other}_weighted IS NULL THEN NULL "
+                f"ELSE MIN(MAX((? + {other}_weighted) / 2.0, 20.0), 90.0) END "
+                f"WHERE code = ?",
+                (None if scores is None else json.dumps(np.asarray(scores, dtype=float).tolist()),
+                 weighted, now, weighted, weighted, code),
+            ).rowcount == 1
+            if not updated:
+                return None
+            row = conn.execute(
+                "SELECT version, updated_at, a_scores, b_scores, rgi FROM pairs WHERE code = ?", (code,)
+            ).fetchone()
+            snap = self._row_snapshot(code, row)
+            if scores is None and not any(snap["submitted"].values()):
+                conn.execute("DELETE FROM pairs WHERE code = ?", (code,))
+        return snap
+
+    def submit(self, code: str, side: str, scores, now: float | None = None):
+        """Record one side's latest raw category scores and update the pair score.
+
+        Returns the updated snapshot, or None if the pair does not exist.
+        """
+        snap = self._set_side(code, side, scores, now)
+        if snap is not None:
+            self._fire(code)
+        return snap
+
+    def withdraw(self, code: str, side: str) -> None:
+        """Forget one side's scores; the pair is dropped once neither side has scores left."""
+        if self._set_side(code, side, None, None) is not None:
+            self._fire(code)
+        if self.version(code) == -1:
+            with self._sub_lock:
+                self._subscribers.pop(code, None)
+
+    def subscribe(self, code: str, key, callback) -> None:
+        """Call `callback(code)` after every later update of the pair made by this process.
+
+        Subscribing again with the same `key` replaces the earlier callback.
+        """
+        with self._sub_lock:
+            self._subscribers.setdefault(code, {})[key] = callback
+
+    def unsubscribe(self, code: str, key) -> None:
+        """Remove the callback subscribed under `key`, if any."""
+        with self._sub_lock:
+            callbacks = self._subscribers.get(code)
+            if callbacks is not None:
+                callbacks.pop(key, None)
+                if not callbacks:
+                    del self._subscribers[code]
+
+    def stats(self) -> dict:
+        with self.pool.connection() as conn:
+            size, complete = conn.execute("SELECT COUNT(*), COUNT(rgi) FROM pairs").fetchone()
+        return {"size": size, "complete": complete}
+
+    def close(self) -> None:
+        self.pool.close()
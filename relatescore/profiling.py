@@ -0,0 +1,109 @@
+"""Sampled per-page CPU profiles in collapsed-stack format.
+
+A sampled fraction of page runs is profiled by a stack sampler: a helper thread
+reads the page thread's Python stack every RELATESCORE_PROFILE_INTERVAL_MS (1 ms)
+while the page function runs. Each profiled run is written to
+
+    RELATESCORE_PROFILE_DIR/<page>-<timestamp>-<pid>-<n>.folded
+
+one "root;caller;...;leaf count" line per distinct stack, rooted at the page
+function. The files open in speedscope (https://www.speedscope.app) or
+flamegraph.pl as they are. Only the newest RELATESCORE_PROFILE_KEEP (20) files
+per page are kept; runs too short to catch a sample write nothing.
+
+RELATESCORE_PROFILE_RATE is the fraction of page runs to profile (0, the
+default, turns sampling off). Other processes and pages are not affected:
+only the profiled run's own thread is sampled.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from itertools import count
+from pathlib import Path
+
+PROFILE_RATE = float(os.environ.get("RELATESCORE_PROFILE_RATE", 0))
+PROFILE_DIR = os.environ.get("RELATESCORE_PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("RELATESCORE_PROFILE_KEEP", 20))
+PROFILE_INTERVAL = float(os.environ.get("RELATESCORE_PROFILE_INTERVAL_MS", 1)) / 1000.0
+
+_seq = count()
+_rotate_lock = threading.Lock()
+
+
+def should_profile(force: bool = False) -> bool:
+    """Whether to profile this page run: always when forced, else with probability PROFILE_RATE."""
+    return force or (PROFILE_RATE > 0 and random.random() < PROFILE_RATE)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _run(fn):
+    # Stack anchor: samples keep only the frames above this one
+    return fn()
+
+
+class StackSampler:
+    """Counts the stacks of one thread below a _run() frame until stopped."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}  # {(root label, ..., leaf label): samples}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="page-profiler", daemon=True)
+
+    def _loop(self):
+        anchor = _run.__code__
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not anchor:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if frame is None or not stack:
+                continue  # not inside the page function (yet / any more)
+            key = tuple(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in sorted(self.stacks.items()))
+
+
+def _rotate(directory: Path, page: str, keep: int) -> None:
+    with _rotate_lock:
+        files = sorted(directory.glob(f"{page}-*.folded"), key=lambda p: p.stat().st_mtime)
+        for old in files[:-keep] if keep > 0 else files:
+            old.unlink(missing_ok=True)
+
+
+def profile_call(page: str, fn, out_dir: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+    """Run fn() (a page function) under the stack sampler and write its profile.
+
+    Exceptions from fn, such as Streamlit's rerun signal, propagate after the
+    profile is written.
+    """
+    sampler = StackSampler(threading.get_ident()).start()
+    try:
+        return _run(fn)
+    finally:
+        sampler.stop()
+        if sampler.samples:
+            directory = Path(out_dir)
+            directory.mkdir(parents=True, exist_ok=True)
+            name = f"{page}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_seq)}.folded"
+            (directory / name).write_text(sampler.collapsed(), encoding="utf-8")
+            _rotate(directory, page, keep)
@@ -0,0 +1,113 @@
+"""Per-client token-bucket rate limiting, shared by all sessions of one process.
+
+Each client key (an IP address or a browser session) has a bucket holding up
+to `burst` tokens that refills at `rate` tokens per second; an attempt spends
+one token or is throttled. A check is a dict lookup plus a few float
+operations under one lock.
+
+Memory stays bounded without a sweep: buckets are kept in least-recently-used
+order, and a bucket idle for burst / rate seconds has refilled completely, so
+it is dropped from the front as new checks come in (a full bucket is the same
+as no bucket). max_clients caps the table if that many clients are active at
+once.
+
+A throttled bucket remembers when its next token is due; until then further
+attempts are rejected on a fast path that skips the refill and LRU update.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_CLIENTS = 100_000
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "blocked_until")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.blocked_until = 0.0
+
+
+class TokenBucketLimiter:
+    """allow(key) -> bool, O(1) per call; stats() exposes the throttle counters."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = DEFAULT_MAX_CLIENTS, clock=time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.idle_seconds = self.burst / self.rate  # after this long a bucket is full again
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets = OrderedDict()  # { key: _Bucket }, least recently refilled first
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = 0
+        self.fast_rejected = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+    # -- called with self._lock held -------------------------------------------
+    def _evict_idle(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if now - oldest.updated < self.idle_seconds:
+                return
+            buckets.popitem(last=False)
+            self.evicted += 1
+
+    # -- public API --------------------------------------------------------------
+    def allow(self, key, cost: float = 1.0, now: float | None = None) -> bool:
+        """Spend `cost` tokens from `key`'s bucket; False (throttled) if it does not hold enough."""
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None and now < bucket.blocked_until:
+                self.fast_rejected += 1
+                return False
+
+            self._evict_idle(now)
+            if bucket is None or key not in self._buckets:
+                bucket = self._buckets[key] = _Bucket(self.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+                    self.evicted += 1
+            else:
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+                self._buckets.move_to_end(key)
+
+            if bucket.tokens >= cost:
+                bucket.tokens -= cost
+                self.allowed += 1
+                return True
+            bucket.blocked_until = now + (cost - bucket.tokens) / self.rate
+            self.throttled += 1
+            return False
+
+    def retry_after(self, key, now: float | None = None) -> float:
+        """Seconds until `key` may try again (0 if it may now)."""
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return max(0.0, bucket.blocked_until - now) if bucket is not None else 0.0
+
+    def stats(self) -> dict:
+        """Decision counters since start (fast_rejected is not included in throttled) and tracked clients."""
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "throttled": self.throttled,
+                "fast_rejected": self.fast_rejected,
+                "evicted": self.evicted,
+                "clients": len(self._buckets),
+                "max_clients": self.max_clients,
+            }
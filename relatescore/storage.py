@@ -0,0 +1,155 @@
+"""Durable user and score-history store on local SQLite (WAL mode).
+
+One Storage is shared by every session of a worker; it hands out pooled
+connections so concurrent script threads do not serialize on one handle.
+"""
+import contextlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id         INTEGER PRIMARY KEY,
+    username   TEXT NOT NULL UNIQUE,
+    password   TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS score_history (
+    user_id  INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    ts       REAL NOT NULL,
+    raw      TEXT NOT NULL,  -- JSON {category: score}
+    smoothed TEXT NOT NULL,  -- JSON {category: score}
+    rgi      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS score_history_user_ts ON score_history (user_id, ts);
+"""
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections usable from any thread."""
+
+    def __init__(self, path: str, size: int = 8, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout_ms / 1000)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe with WAL
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self._connect()
+        return self._idle.get()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class Storage:
+    """Users indexed by username and score snapshots indexed by (user, ts)."""
+
+    def __init__(self, path: str, pool_size: int = 8):
+        self.pool = ConnectionPool(path, size=pool_size)
+        with self.pool.connection() as conn, conn:
+            conn.executescript(SCHEMA)
+
+    # -- users ---------------------------------------------------------------
+    def create_user(self, username: str, password: str) -> bool:
+        """Insert a new account. Returns False if the username is taken."""
+        try:
+            with self.pool.connection() as conn, conn:
+                conn.execute(
+                    "INSERT INTO users (username, password, created_at) VALUES (?, ?, ?)",
+                    (username, password, time.time()),
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def set_password(self, username: str, password: str) -> None:
+        with self.pool.connection() as conn, conn:
+            conn.execute("UPDATE users SET password = ? WHERE username = ?", (password, username))
+
+    def get_password(self, username: str):
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, username: str) -> bool:
+        return self.get_password(username) is not None
+
+    # -- score history -------------------------------------------------------
+    def append_scores(self, username: str, ts: float, raw: dict, smoothed: dict, rgi: float) -> bool:
+        """Persist one submission. Returns False if the user does not exist."""
+        with self.pool.connection() as conn, conn:
+            cur = conn.execute(
+                "INSERT INTO score_history (user_id, ts, raw, smoothed, rgi) "
+                "SELECT id, ?, ?, ?, ? FROM users WHERE username = ?",
+                (ts, json.dumps(raw), json.dumps(smoothed), rgi, username),
+            )
+        return cur.rowcount == 1
+
+    def latest_scores(self, username: str):
+        """(smoothed, ts) of the user's most recent submission, or (None, None)."""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT smoothed, ts FROM score_history "
+                "WHERE user_id = (SELECT id FROM users WHERE username = ?) "
+                "ORDER BY ts DESC LIMIT 1",
+                (username,),
+            ).fetchone()
+        if not row:
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def score_history(self, username: str, limit: int = 20) -> list:
+        """Most recent submissions, oldest first, as {"ts", "raw", "smoothed", "rgi"} dicts."""
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT ts, raw, smoothed, rgi FROM score_history "
+                "WHERE user_id = (SELECT id FROM users WHERE username = ?) "
+                "ORDER BY ts DESC LIMIT ?",
+                (username, limit),
+            ).fetchall()
+        return [
+            {"ts": ts, "raw": json.loads(raw), "smoothed": json.loads(smoothed), "rgi": rgi}
+            for ts, raw, smoothed, rgi in reversed(rows)
+        ]
+
+    def delete_score_history(self, username: str) -> int:
+        """Erase every stored submission for the user (withdrawal). Returns rows removed."""
+        with self.pool.connection() as conn, conn:
+            cur = conn.execute(
+                "DELETE FROM score_history WHERE user_id = (SELECT id FROM users WHERE username = ?)",
+                (username,),
+            )
+        return cur.rowcount
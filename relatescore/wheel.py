@@ -0,0 +1,351 @@
+"""RQ Wheel drawing: category colors, wheel geometry, and the matplotlib and SVG renderers.
+
+Everything that does not depend on the scores is built once per process and
+shared: angles, wedge corners and label directions per category count
+(wheel_layout) and a color lookup table per category over the 20-90 intensity
+ramp (color_table). draw_rq_wheel adds the wedges as one PolyCollection and the
+radial lines as one LineCollection instead of an ax.fill/ax.plot per category.
+WheelRenderCache keeps rendered images for reuse across sessions.
+"""
+import html
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from relatescore import metrics
+
+CATEGORY_COLORS = {
+    "Emotional Awareness": "#4A90E2",
+    "Communication Style": "#7ED321",
+    "Conflict Tendencies": "#FF6B6B",
+    "Attachment Patterns": "#A29BFE",
+    "Empathy & Responsiveness": "#FFD700",
+    "Self-Insight": "#5A67D8",
+    "Trust & Boundaries": "#20C997",
+    "Stability & Consistency": "#A1887F"
+}
+DEFAULT_BASE_COLOR = "#4A90E2"
+WARM_NEUTRAL = "#F5F5F5"  # Light neutral base
+GOLD = "#C9A96E"
+
+
+def _hex_to_rgb01(hex_color: str):
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i:i+2], 16) / 255.0 for i in (0, 2, 4))
+
+
+def _blend_hex(c1: str, c2: str, t: float) -> str:
+    """Blend c1->c2 with t in [0,1]. Returns hex string."""
+    t = float(np.clip(t, 0.0, 1.0))
+    r1, g1, b1 = _hex_to_rgb01(c1)
+    r2, g2, b2 = _hex_to_rgb01(c2)
+    r = r1 + (r2 - r1) * t
+    g = g1 + (g2 - g1) * t
+    b = b1 + (b2 - b1) * t
+    return "#{:02X}{:02X}{:02X}".format(int(r * 255), int(g * 255), int(b * 255))
+
+
+def _category_dynamic_color(category: str, score: float) -> str:
+    """Real-time color per category based on its score (0-100):
+    - Low scores bias toward a warm neutral (subtle)
+    - High scores move toward the category's base color
+    """
+    base = CATEGORY_COLORS.get(category, DEFAULT_BASE_COLOR)
+    # Map score to intensity; keep conservative so it stays premium
+    intensity = float(np.clip((score - 20.0) / 70.0, 0.0, 1.0))  # 20->0, 90->1
+    return _blend_hex(WARM_NEUTRAL, base, intensity)
+
+
+def format_label(cat: str) -> str:
+    return cat.replace(" & ", " &\n")
+
+
+# -----------------------------
+# Color lookup tables
+# Notes:
+# - _category_dynamic_color is flat below 20 and above 90, so a table over 20-90 covers every score.
+# - 20 steps per point: wedge colors use the mean of two scores rounded to one decimal
+#   (the render cache key), which always falls on the grid. Scores off the grid are
+#   blended directly, so colors never differ from _category_dynamic_color.
+COLOR_LUT_LOW = 20.0
+COLOR_LUT_HIGH = 90.0
+COLOR_LUT_STEPS_PER_POINT = 20
+_NEUTRAL_RGB = np.array(_hex_to_rgb01(WARM_NEUTRAL))
+
+
+def _blend_rgb8(bases: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """_category_dynamic_color vectorized: 8-bit RGB for base colors (..., 3) at scores (...)."""
+    t = np.clip((scores - 20.0) / 70.0, 0.0, 1.0)[..., None]
+    # same arithmetic as _blend_hex, including int() truncation
+    return ((_NEUTRAL_RGB + (bases - _NEUTRAL_RGB) * t) * 255).astype(np.int64)
+
+
+def _hex_strings(rgb8: np.ndarray) -> list:
+    return ["#{:02X}{:02X}{:02X}".format(*row) for row in rgb8.tolist()]
+
+
+@lru_cache(maxsize=None)
+def color_table(category: str) -> tuple:
+    """(hex strings, read-only (steps, 3) RGB array) for scores COLOR_LUT_LOW..COLOR_LUT_HIGH.
+
+    Entry i is _category_dynamic_color(category, COLOR_LUT_LOW + i / COLOR_LUT_STEPS_PER_POINT).
+    """
+    steps = int((COLOR_LUT_HIGH - COLOR_LUT_LOW) * COLOR_LUT_STEPS_PER_POINT) + 1
+    scores = COLOR_LUT_LOW + np.arange(steps) / COLOR_LUT_STEPS_PER_POINT
+    base = np.array(_hex_to_rgb01(CATEGORY_COLORS.get(category, DEFAULT_BASE_COLOR)))
+    rgb8 = _blend_rgb8(base, scores)
+    rgb = rgb8 / 255.0
+    rgb.setflags(write=False)
+    return tuple(_hex_strings(rgb8)), rgb
+
+
+@lru_cache(maxsize=16)
+def _wheel_tables(categories: tuple) -> tuple:
+    hexes = np.array([color_table(c)[0] for c in categories], dtype=object)
+    rgb = np.stack([color_table(c)[1] for c in categories])
+    bases = np.array([_hex_to_rgb01(CATEGORY_COLORS.get(c, DEFAULT_BASE_COLOR)) for c in categories])
+    labels = [format_label(c) for c in categories]
+    hex_codes = [CATEGORY_COLORS.get(c, "#000000") for c in categories]
+    return hexes, rgb, bases, labels, hex_codes
+
+
+def wheel_colors(categories, scores) -> tuple:
+    """Colors for one score per category: (hex strings, (n, 3) RGB array)."""
+    hexes, rgb, bases, _, _ = _wheel_tables(tuple(categories))
+    clipped = np.clip(np.asarray(scores, dtype=float), COLOR_LUT_LOW, COLOR_LUT_HIGH)
+    steps = (clipped - COLOR_LUT_LOW) * COLOR_LUT_STEPS_PER_POINT
+    idx = np.rint(steps).astype(np.intp)
+    rows = np.arange(len(idx))
+    if np.all(np.abs(steps - idx) < 1e-6):
+        return hexes[rows, idx].tolist(), rgb[rows, idx]
+    rgb8 = _blend_rgb8(bases, clipped)
+    return _hex_strings(rgb8), rgb8 / 255.0
+
+
+# -----------------------------
+# Wheel geometry
+# -----------------------------
+@lru_cache(maxsize=16)
+def wheel_layout(n: int) -> dict:
+    """Score-independent geometry of an n-category wheel (read-only arrays, shared).
+
+    "angles" are the category axes (0 rad at North once the axes are turned),
+    "next" the index of the following category, "wedge_theta" the four corner
+    angles of each wedge and "unit"/"mid_unit" the cartesian directions of the
+    axes and of the label anchors.
+    """
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    nxt = (np.arange(n) + 1) % n
+    # The last sector's midpoint averages with angle 0, as the wheel always has
+    mid_angle = (angles + angles[nxt]) / 2.0
+    wedge_theta = np.stack([angles, angles, angles[nxt], angles[nxt]], axis=1)
+    wedge_theta[-1, 2:] += 2 * np.pi
+
+    layout = {
+        "angles": angles,
+        "next": nxt,
+        "angles_loop": np.append(angles, angles[0]),
+        "mid_angle": mid_angle,
+        "wedge_theta": wedge_theta,
+        "unit": np.stack([-np.sin(angles), np.cos(angles)], axis=-1),
+        "mid_unit": np.stack([-np.sin(mid_angle), np.cos(mid_angle)], axis=-1),
+    }
+    for arr in layout.values():
+        arr.setflags(write=False)
+    return layout
+
+
+def _score_values(categories, scores_dict) -> np.ndarray:
+    # Default to 50 if missing
+    return np.array([float(scores_dict.get(c, 50.0)) for c in categories], dtype=float)
+
+
+@metrics.timed(metrics.CALL_SECONDS, function="draw_rq_wheel")
+def draw_rq_wheel(ax, categories, scores_dict):
+    """Draw an RQ Wheel with per-category colors + wedge fills."""
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    n = len(categories)
+    layout = wheel_layout(n)
+    _, _, _, labels, hex_codes = _wheel_tables(tuple(categories))
+    values = _score_values(categories, scores_dict)
+    next_values = values[layout["next"]]
+    avg_v = (values + next_values) / 2.0
+
+    # Set theta zero to North (top)
+    ax.set_theta_zero_location('N')
+
+    # Background + hide default grid/spines
+    ax.set_facecolor("#FAF7F2")
+    ax.grid(False)
+    ax.spines['polar'].set_visible(False)
+    ax.set_ylim(0, 110)  # Extra space for labels if needed
+    ax.set_yticks([])
+    ax.set_xticks([])
+
+    # Bold gold radial lines up to each vertex, one artist
+    radial = np.zeros((n, 2, 2))
+    radial[:, :, 0] = layout["angles"][:, None]
+    radial[:, 1, 1] = values
+    ax.add_collection(LineCollection(radial, colors=GOLD, linewidths=3, capstyle="projecting", zorder=1))
+
+    # Colored wedges per category, one artist (simulated gradient via blend and alpha;
+    # the average of the two edge scores sets the color intensity)
+    _, rgb = wheel_colors(categories, avg_v)
+    wedges = np.zeros((n, 4, 2))
+    wedges[:, :, 0] = layout["wedge_theta"]
+    wedges[:, 1, 1] = values
+    wedges[:, 2, 1] = next_values
+    ax.add_collection(PolyCollection(wedges, facecolors=rgb, edgecolors=rgb, alpha=0.25, linewidths=0, zorder=0))
+
+    # Outline polygon (gold, bold)
+    ax.plot(layout["angles_loop"], np.append(values, values[0]), linewidth=3, color=GOLD, zorder=2)
+
+    # Center gold marker
+    ax.scatter(0, 0, marker='o', s=50, color='#FFD700', zorder=3)
+
+    # Add labels and hex codes inside sectors (horizontal, bold black)
+    label_r = avg_v * 0.45 + 10  # Position inside, adjusted for low scores
+    hex_r = avg_v * 0.65 + 10    # Hex above label
+    for i, mid_angle in enumerate(layout["mid_angle"]):
+        ax.text(mid_angle, hex_r[i], hex_codes[i], ha='center', va='center', fontsize=8, color='black', rotation=0, zorder=4)
+        ax.text(mid_angle, label_r[i], labels[i], ha='center', va='center', fontsize=10, fontweight='bold', color='black', rotation=0, zorder=4)
+
+
+# -----------------------------
+# SVG backend (no matplotlib)
+# Notes:
+# - Same polygon, wedges, colors and label placement as draw_rq_wheel, emitted as SVG.
+# - Units are points at the dashboard figure size (6.3in polar axes, ylim 0-110), so
+#   line widths and font sizes match the matplotlib rendering.
+WHEEL_SVG_RADIUS_PT = 174.636  # radius of r=110 in the 6.3in figure
+WHEEL_SVG_FONT = "DejaVu Sans, Helvetica, Arial, sans-serif"
+
+
+def wheel_geometry(categories, scores_dict) -> dict:
+    """Cartesian RQ Wheel geometry in score units (y up, 0 rad at North, counter-clockwise).
+
+    Mirrors draw_rq_wheel: vertices, per-wedge colors and hex/label anchor points.
+    """
+    layout = wheel_layout(len(categories))
+    _, _, _, _, hex_codes = _wheel_tables(tuple(categories))
+    values = _score_values(categories, scores_dict)
+    avg_v = (values + values[layout["next"]]) / 2.0
+
+    return {
+        "vertices": layout["unit"] * values[:, None],
+        "hex_xy": layout["mid_unit"] * (avg_v * 0.65 + 10)[:, None],
+        "label_xy": layout["mid_unit"] * (avg_v * 0.45 + 10)[:, None],
+        "colors": wheel_colors(categories, avg_v)[0],
+        "hex_codes": hex_codes,
+    }
+
+
+def _svg_points(xy: np.ndarray) -> list:
+    scaled = xy * (WHEEL_SVG_RADIUS_PT / 110.0) * np.array([1.0, -1.0])  # SVG y grows downward
+    return ["{:.2f},{:.2f}".format(x, y) for x, y in scaled]
+
+
+def _svg_text(xy_str: str, text: str, size: int, bold: bool) -> str:
+    x, y = xy_str.split(",")
+    lines = text.split("\n")
+    weight = ' font-weight="bold"' if bold else ""
+    # center the whole block on the anchor like matplotlib's va='center' (1.2 line spacing)
+    first_dy = -0.6 * (len(lines) - 1)
+    spans = "".join(
+        f'<tspan x="{x}" dy="{first_dy if i == 0 else 1.2:.1f}em">{html.escape(line)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (f'<text x="{x}" y="{y}" font-size="{size}"{weight} fill="black" text-anchor="middle" '
+            f'dominant-baseline="central">{spans}</text>')
+
+
+@metrics.timed(metrics.CALL_SECONDS, function="draw_rq_wheel_svg")
+def draw_rq_wheel_svg(categories, scores_dict) -> str:
+    """SVG twin of draw_rq_wheel, computed directly with NumPy."""
+    g = wheel_geometry(categories, scores_dict)
+    verts = _svg_points(g["vertices"])
+    hex_xy = _svg_points(g["hex_xy"])
+    label_xy = _svg_points(g["label_xy"])
+    labels = _wheel_tables(tuple(categories))[3]
+    n = len(categories)
+    r = WHEEL_SVG_RADIUS_PT
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{-r:.2f} {-r:.2f} {2 * r:.2f} {2 * r:.2f}" '
+        f'font-family="{WHEEL_SVG_FONT}" role="img" aria-label="RQ Wheel">',
+        f'<circle cx="0" cy="0" r="{r:.2f}" fill="#FAF7F2"/>',
+    ]
+    # Colored wedges per category
+    for i in range(n):
+        parts.append(f'<path d="M0,0 L{verts[i]} L{verts[(i + 1) % n]} Z" '
+                     f'fill="{g["colors"][i]}" fill-opacity="0.25"/>')
+    # Gold radial lines, outline polygon and center marker
+    for i in range(n):
+        parts.append(f'<path d="M0,0 L{verts[i]}" stroke="{GOLD}" stroke-width="3" stroke-linecap="square"/>')
+    parts.append(f'<path d="M{" L".join(verts)} Z" fill="none" stroke="{GOLD}" stroke-width="3" '
+                 f'stroke-linejoin="round"/>')
+    parts.append(f'<circle cx="0" cy="0" r="{np.sqrt(50) / 2:.2f}" fill="#FFD700"/>')
+    # Hex codes and category labels
+    for i in range(n):
+        parts.append(_svg_text(hex_xy[i], g["hex_codes"][i], 8, bold=False))
+        parts.append(_svg_text(label_xy[i], labels[i], 10, bold=True))
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+# -----------------------------
+# Render cache
+# -----------------------------
+WHEEL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+class WheelRenderCache:
+    """LRU cache of rendered wheel images bounded by total image bytes."""
+
+    def __init__(self, max_bytes: int = WHEEL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()  # { key: png bytes | svg text }, least recently used first
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            png = self._images.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png) -> None:
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._images[key] = png
+            self.bytes += len(png)
+            while self.bytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Counters for sizing the byte budget."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._images),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }